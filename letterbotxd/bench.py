@@ -0,0 +1,668 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ---------------------------
+# Micro-benchmarks (python letterbotxd/letterbotxd.py bench --help)
+# ---------------------------
+import statistics
+import time
+from pathlib import Path
+
+import typer
+
+FIXTURES = Path("data/fixtures")
+
+app = typer.Typer(help="Micro-benchmarks over the fixtures in data/fixtures.")
+
+
+def _timeit(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _summary(name: str, samples: list[float]) -> str:
+    return f"{name:<10} median {statistics.median(samples) * 1000:8.3f} ms  min {min(samples) * 1000:8.3f} ms"
+
+
+# Parser de reseñas anterior, se conserva solo como referencia para comparar
+def _legacy_parse_reviews(sel, max_reviews=10):
+    import html
+    import re
+    from datetime import datetime
+
+    from parsel import Selector
+
+    from bot.models import Review
+
+    articles = sel.xpath('//article[contains(@class,"production-viewing")]').getall()[:max_reviews]
+    rvws = []
+    for art in articles:
+        art = Selector(text=art)
+        reviewer = art.xpath('//a[contains(@class,"avatar")]/@href').re_first(r"/([^/]+)/") or "anon"
+        reviewer_pic = art.xpath('//a[contains(@class,"avatar")]/img/@src').get()
+        rating_text = art.xpath('//span[contains(@class,"rating")]/text()').get()
+        if rating_text:
+            rating = rating_text.count('★') + 0.5 * rating_text.count('½')
+        else:
+            rating = 0
+        date_iso = art.xpath('//time/@datetime').get()
+        date = datetime.fromisoformat(date_iso) if date_iso else None
+        likes_txt = art.xpath('//span[contains(@class,"like-link")]').get()
+        likes = int(likes_txt.replace(",", "")) if likes_txt else None
+        review_div = art.xpath('//div[contains(@class,"js-review-body")]')
+        review_lines = []
+        B_TAG_OPEN = re.compile(r"(?i)<\s*(b|strong)(\s+[^>]*)?>")
+        B_TAG_CLOSE = re.compile(r"(?i)</\s*(b|strong)\s*>")
+        for p in review_div.css("p"):
+            cleaned_html = re.sub(r"(?i)<br\s*/?>", "\n", p.get())
+            cleaned_html = B_TAG_OPEN.sub("[b]", cleaned_html)
+            cleaned_html = B_TAG_CLOSE.sub("[/b]", cleaned_html)
+            p_text = Selector(text=cleaned_html).xpath("string()").get()
+            for raw in p_text.splitlines():
+                clean = html.unescape(raw).replace("\xa0", " ").strip()
+                if clean:
+                    review_lines.append(clean)
+        rvws.append(
+            Review(
+                reviewer=reviewer,
+                reviewer_pic=reviewer_pic,
+                rating=rating,
+                date=date,
+                likes=likes,
+                text="\n".join(review_lines) if review_lines else "",
+            )
+        )
+    return rvws
+
+
+@app.command()
+def reviews(repeat: int = typer.Option(200, help="Iterations per fixture page.")):
+    """Compare the single-pass review parser with the previous one over saved review pages."""
+    from parsel import Selector
+
+    from bot.letterboxd import _parse_reviews
+
+    pages = sorted((FIXTURES / "reviews").glob("*.html"))
+    if not pages:
+        print(f"No review fixtures in {FIXTURES / 'reviews'}")
+        raise typer.Exit(1)
+
+    legacy, current = [], []
+    for page in pages:
+        sel = Selector(text=page.read_text(encoding="utf-8"))
+        # el parser anterior no leía el id de la reseña ni los likes (buscaba un span que no existe)
+        current_reviews = [review.model_copy(update={"id": None, "likes": None}) for review in _parse_reviews(sel, 50)]
+        if _legacy_parse_reviews(sel, 50) != current_reviews:
+            print(f"Parsers disagree on {page.name}")
+            raise typer.Exit(1)
+        legacy += _timeit(lambda: _legacy_parse_reviews(sel, 50), repeat)
+        current += _timeit(lambda: _parse_reviews(sel, 50), repeat)
+
+    print(f"{len(pages)} pages, identical output")
+    print(_summary("legacy", legacy))
+    print(_summary("current", current))
+    print(f"speedup    x{statistics.median(legacy) / statistics.median(current):.1f}")
+
+
+@app.command()
+def ranker(margin: float = typer.Option(None, help="Margin the local ranker must win by; defaults to the configured one.")):
+    """Ranker margin per saved review page, and whether the ranker or Gemini would decide."""
+    from parsel import Selector
+
+    from bot import ranker as local_ranker
+    from bot.config import Settings
+    from bot.letterboxd import _accepts, _parse_reviews
+    from bot.models import ReviewFilter
+
+    pages = sorted((FIXTURES / "reviews").glob("*.html"))
+    if not pages:
+        print(f"No review fixtures in {FIXTURES / 'reviews'}")
+        raise typer.Exit(1)
+    if margin is None:
+        margin = Settings().ranker_margin
+
+    decided = 0
+    for page in pages:
+        # lo mismo que ve get_random_movie: las 10 primeras que pasan el filtro
+        accepted = [review for review in _parse_reviews(Selector(text=page.read_text(encoding="utf-8")), 50)
+                    if _accepts(review, ReviewFilter())][:10]
+        if not accepted:
+            print(f"{page.name:<12} no reviews accepted")
+            continue
+        index, lead = local_ranker.rank(accepted)
+        local = lead >= margin
+        decided += local
+        print(f"{page.name:<12} {len(accepted):2d} reviews  margin {lead:5.2f}  {'ranker' if local else 'gemini'}"
+              f"  (best has {accepted[index].likes or 0} likes)")
+
+    print(f"{decided}/{len(pages)} pages decided locally at margin {margin:.2f}")
+    if not decided:
+        raise typer.Exit(1)
+
+
+@app.command()
+def blur(
+    repeat: int = typer.Option(5, help="Iterations per mode."),
+    max_mean_error: float = typer.Option(1.0, help="Fail if the mean per-channel difference (0-255) is above this."),
+):
+    """Time the exact and fast background blur and measure how much they differ."""
+    from PIL import Image, ImageChops, ImageStat
+
+    from bot.render.background import blur_poster, render_background
+
+    size = (992, 688)
+    with Image.open(FIXTURES / "images" / "poster.jpg") as img:
+        poster = img.convert("RGBA")
+
+    exact = render_background(poster, size, fast=False)
+    fast = render_background(poster, size, fast=True)
+    diff = ImageChops.difference(exact.convert("RGB"), fast.convert("RGB"))
+    mean_error = sum(ImageStat.Stat(diff).mean) / 3
+    max_error = max(high for _, high in diff.getextrema())
+
+    print(_summary("exact", _timeit(lambda: blur_poster(poster, size, fast=False), repeat)))
+    print(_summary("fast", _timeit(lambda: blur_poster(poster, size, fast=True), repeat)))
+    print(f"difference mean {mean_error:.3f}  max {max_error}")
+    if mean_error > max_mean_error:
+        print(f"Fast blur differs too much (mean {mean_error:.3f} > {max_mean_error})")
+        raise typer.Exit(1)
+
+
+@app.command()
+def poster(
+    repeat: int = typer.Option(10, help="Iterations per mode."),
+    max_mean_error: float = typer.Option(2.0, help="Fail if the ingested poster differs more than this (0-255 mean)."),
+):
+    """Full 2x decode vs ingest at layout size (1x source, draft/reduce) vs the normalized cache."""
+    from io import BytesIO
+
+    from PIL import Image, ImageChops, ImageStat
+
+    from bot.render.poster import draft_poster, fit_poster, normalize_poster
+
+    source_1x = (FIXTURES / "images" / "poster.jpg").read_bytes()
+    with Image.open(BytesIO(source_1x)) as img:
+        buf = BytesIO()
+        img.resize((img.width * 2, img.height * 2), Image.LANCZOS).save(buf, format="JPEG", quality=90)
+    source_2x = buf.getvalue()
+
+    def full_decode(data: bytes) -> Image.Image:
+        # lo que hacía render() con el póster 2x
+        with Image.open(BytesIO(data)) as img:
+            return fit_poster(img.convert("RGBA"))
+
+    def decoded_size(data: bytes, draft: bool) -> tuple[int, int]:
+        with Image.open(BytesIO(data)) as img:
+            if draft:
+                draft_poster(img)
+            return img.size
+
+    normalized = BytesIO()
+    normalize_poster(source_1x).save(normalized, format="PNG", compress_level=1)
+    normalized = normalized.getvalue()
+
+    reference = full_decode(source_2x).convert("RGB")
+    mean_error = max(
+        sum(ImageStat.Stat(ImageChops.difference(reference, fit_poster(normalize_poster(data)))).mean) / 3
+        for data in (source_1x, source_2x)
+    )
+
+    rows = [
+        ("full 2x", source_2x, lambda: full_decode(source_2x), decoded_size(source_2x, draft=False)),
+        ("ingest 2x", source_2x, lambda: normalize_poster(source_2x), decoded_size(source_2x, draft=True)),
+        ("ingest", source_1x, lambda: normalize_poster(source_1x), decoded_size(source_1x, draft=True)),
+        ("cached", normalized, lambda: fit_poster(Image.open(BytesIO(normalized)).convert("RGBA")), decoded_size(normalized, draft=False)),
+    ]
+    for name, data, fn, (w, h) in rows:
+        print(f"{_summary(name, _timeit(fn, repeat)):<52}  {len(data) / 1024:7.0f} KB  decoded {w}x{h} ({w * h * 4 / 2**20:.1f} MB RGBA)")
+    print(f"ingest vs full decode: mean difference {mean_error:.3f}")
+    if mean_error > max_mean_error:
+        print(f"Ingested poster differs too much (mean {mean_error:.3f} > {max_mean_error})")
+        raise typer.Exit(1)
+
+
+# best_fit anterior (medición de la línea completa en cada palabra), solo como referencia
+def _legacy_best_fit(text, box, font_path, min_size=10, max_size=250, line_spacing=0.1):
+    from PIL import Image, ImageDraw, ImageFont
+
+    def wrap(text, font, max_width, draw):
+        lines = []
+        for paragraph in text.split("\n"):
+            if paragraph.strip() == "":
+                lines.append("")
+                continue
+            buf = []
+            for word in paragraph.split():
+                buf.append(word)
+                if draw.textlength(" ".join(buf), font=font) > max_width and len(buf) > 1:
+                    buf.pop()
+                    lines.append(" ".join(buf))
+                    buf = [word]
+            if buf:
+                lines.append(" ".join(buf))
+        return lines
+
+    w_box, h_box = box
+    lo, hi, best = min_size, max_size, None
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        font = ImageFont.truetype(font_path, mid)
+        lines = wrap(text, font, w_box, draw)
+        bbox = draw.textbbox((0, 0), "Ay", font=font)
+        total_h = int((bbox[3] - bbox[1]) * (1 + line_spacing) * len(lines))
+        if total_h <= h_box and all(draw.textlength(line, font=font) <= w_box for line in lines):
+            best = (font, lines)
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    if best is None:
+        font = ImageFont.truetype(font_path, min_size)
+        return font, wrap(text, font, w_box, draw)
+    return best
+
+
+@app.command()
+def fit(
+    repeat: int = typer.Option(5, help="Iterations per text."),
+    check: bool = typer.Option(False, "--check", help="Only compare the output, without timing (for CI)."),
+):
+    """
+    Compare best_fit with the previous implementation on short and 1-2k character
+    reviews. Exits with 1 if any font size or line break differs: this is the
+    regression check for best_fit.
+    """
+    import json
+
+    from bot.post import design, font_body_path
+    from bot.render.text_fit import best_fit
+
+    texts = json.loads((FIXTURES / "review_texts.json").read_text(encoding="utf-8"))
+    box = (design["reviewWidth"], design["reviewHeight"])
+
+    legacy, current = [], []
+    for text in texts:
+        text = f'"{text}"'
+        old_font, old_lines = _legacy_best_fit(text, box, font_body_path)
+        new_font, new_lines = best_fit(text, box, font_body_path)
+        if (old_font.size, old_lines) != (new_font.size, new_lines):
+            print(f"Different result for {text[:40]!r}: size {old_font.size} vs {new_font.size}")
+            raise typer.Exit(1)
+        if check:
+            continue
+        legacy_s = _timeit(lambda: _legacy_best_fit(text, box, font_body_path), repeat)
+        current_s = _timeit(lambda: best_fit(text, box, font_body_path), repeat)
+        print(f"{len(text):5d} chars  size {new_font.size:3d}  "
+              f"x{statistics.median(legacy_s) / statistics.median(current_s):5.1f}")
+        legacy += legacy_s
+        current += current_s
+
+    print(f"{len(texts)} texts, identical sizes and line breaks")
+    if check:
+        return
+    print(_summary("legacy", legacy))
+    print(_summary("current", current))
+    print(f"speedup    x{statistics.median(legacy) / statistics.median(current):.1f}")
+
+
+@app.command()
+def assets(repeat: int = typer.Option(20, help="Iterations per mode.")):
+    """Per-render cost of corner masks, the avatar circle and star icons, uncached vs cached."""
+    from PIL import Image
+
+    from bot.post import icon_star_full_path, icon_star_half_path
+    from bot.render.icons import get_icon
+    from bot.render.rounder import circle_image, circle_mask, round_image, rounded_mask
+
+    background = Image.new("RGBA", (992, 688), (40, 40, 40, 64))
+    poster = Image.new("RGBA", (459, 688), (200, 120, 40, 255))
+    with Image.open(FIXTURES / "images" / "avatar.jpg") as img:
+        avatar = img.convert("RGBA")
+
+    def render_assets():
+        round_image(background, radius=16)
+        round_image(poster, radius=(16, 0, 0, 16))
+        circle_image(avatar, size=48)
+        get_icon(icon_star_full_path, 32)
+        get_icon(icon_star_half_path, 32)
+
+    def cold():
+        for cached in (rounded_mask, circle_mask, get_icon):
+            cached.cache_clear()
+        render_assets()
+
+    uncached = _timeit(cold, repeat)
+    render_assets()
+    cached = _timeit(render_assets, repeat)
+    print(_summary("uncached", uncached))
+    print(_summary("cached", cached))
+    print(f"speedup    x{statistics.median(uncached) / statistics.median(cached):.1f}")
+
+
+# Sombra anterior sobre el lienzo completo, solo como referencia
+def _legacy_shadow(img, overlay):
+    from PIL import Image, ImageFilter
+
+    alpha_shadow = overlay.getchannel('A').point(lambda p: 120 if p > 200 else 0)
+    img_shadow = Image.new('RGBA', overlay.size, (0, 0, 0, 0))
+    img_shadow.putalpha(alpha_shadow)
+    img_shadow = img_shadow.filter(ImageFilter.GaussianBlur(radius=1))
+    img.paste(img_shadow, (1, 1), img_shadow)
+    img.paste(overlay, (0, 0), overlay)
+
+
+@app.command()
+def shadow(
+    repeat: int = typer.Option(50, help="Iterations per mode."),
+    check: bool = typer.Option(False, "--check", help="Only compare the output, without timing (for CI)."),
+):
+    """
+    Check that the bounding-box shadow pass is pixel-identical to the full-canvas
+    one, and time both. Exits with 1 on any differing pixel: this is the
+    regression check for paste_with_shadow.
+    """
+    from PIL import Image, ImageChops, ImageDraw
+
+    from bot.post import font_body_path, font_title_path
+    from bot.render.fonts import get_font
+    from bot.render.shadow import paste_with_shadow
+
+    with Image.open(FIXTURES / "images" / "poster.jpg") as img:
+        base = img.convert("RGBA").resize((1024, 720))
+
+    def overlay(texts):
+        layer = Image.new("RGBA", base.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        for xy, text, font, fill in texts:
+            draw.text(xy, text, font=font, fill=fill)
+        return layer
+
+    title, body = get_font(font_title_path, 32), get_font(font_body_path, 24)
+    cases = {
+        "text column": overlay([
+            ((512, 32), "Fixture Film (2020)", title, (255, 255, 255)),
+            ((512, 88), "Directed by", body, (153, 170, 187)),
+            ((512, 242), "absolutely unhinged and I loved it", body, (255, 255, 255, 160)),
+        ]),
+        "canvas edges": overlay([
+            ((-4, -6), "top left corner", title, (255, 255, 255)),
+            ((900, 700), "bottom right", title, (255, 255, 255)),
+        ]),
+        "empty": overlay([]),
+    }
+
+    for name, layer in cases.items():
+        legacy, current = base.copy(), base.copy()
+        _legacy_shadow(legacy, layer)
+        paste_with_shadow(current, layer)
+        if ImageChops.difference(legacy, current).getbbox() is not None:
+            print(f"Shadow output differs for '{name}'")
+            raise typer.Exit(1)
+    print(f"{len(cases)} cases, pixel-identical")
+    if check:
+        return
+
+    layer = cases["text column"]
+    print(_summary("legacy", _timeit(lambda: _legacy_shadow(base.copy(), layer), repeat)))
+    print(_summary("bbox", _timeit(lambda: paste_with_shadow(base.copy(), layer), repeat)))
+
+
+RENDER_STAGES = ("poster_load", "background", "poster_round", "text_fit", "markup", "shadow", "encode", "total")
+
+
+@app.command()
+def render(
+    repeat: int = typer.Option(10, help="Renders per fixture movie."),
+    baseline: Path = typer.Option(Path("data/bench/render_baseline.json"), help="Stored per-stage medians."),
+    tolerance: float = typer.Option(0.5, help="Allowed slowdown over the baseline median (0.5 = 50%)."),
+    update_baseline: bool = typer.Option(False, help="Write the measured medians as the new baseline."),
+):
+    """Time every render stage over the fixture movies and compare against the stored baseline."""
+    import json
+    import resource
+    import tempfile
+
+    from bot.metrics import percentile
+    from bot.models import Movie
+    from bot.post import render as render_post
+    from bot.timing import Timings
+
+    items = [json.loads(line) for line in (FIXTURES / "movies.jsonl").read_text(encoding="utf-8").splitlines() if line.strip()]
+    samples: dict[str, list[float]] = {stage: [] for stage in RENDER_STAGES}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for item in items:
+            movie = Movie.model_validate(item)
+            args = (movie, item["poster_path"], item["profile_pic_path"], str(Path(tmp) / "post.png"))
+            render_post(*args, background_cache_dir=None)  # calentar fuentes, máscaras e iconos
+            for _ in range(repeat):
+                timings = Timings()
+                render_post(*args, background_cache_dir=None, timings=timings)
+                for stage in RENDER_STAGES[:-1]:
+                    samples[stage].append(timings.duration(stage))
+                samples["total"].append(time.perf_counter() - timings.t0)
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    medians = {stage: statistics.median(values) * 1000 for stage, values in samples.items()}
+
+    print(f"{len(items)} fixtures x {repeat} renders")
+    print(f"{'stage':<14}{'median':>10}{'p95':>10}{'baseline':>10}")
+    stored = json.loads(baseline.read_text()) if baseline.exists() else {}
+    regressions = []
+    for stage in RENDER_STAGES:
+        p95 = percentile(samples[stage], 0.95) * 1000
+        base = stored.get(stage)
+        print(f"{stage:<14}{medians[stage]:>8.2f}ms{p95:>8.2f}ms" + (f"{base:>8.2f}ms" if base is not None else f"{'-':>10}"))
+        # 0.5 ms de holgura para que las etapas muy cortas no fallen por ruido
+        if base is not None and medians[stage] > base * (1 + tolerance) + 0.5:
+            regressions.append(stage)
+    print(f"peak RSS {peak_rss_mb:.1f} MB")
+
+    if update_baseline:
+        baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline.write_text(json.dumps({stage: round(value, 3) for stage, value in medians.items()}, indent=4) + "\n")
+        print(f"Baseline written to {baseline}")
+    elif regressions:
+        print(f"Regression over {tolerance:.0%} in: {', '.join(regressions)}")
+        raise typer.Exit(1)
+
+
+@app.command()
+def scrape(
+    runs: int = typer.Option(20, help="Full scrapes per mode."),
+    latency: float = typer.Option(0.05, help="Simulated latency per request, in seconds."),
+    fixtures: Path = typer.Option(FIXTURES / "replay", help="Recorded fixture directory."),
+    max_rps: float = typer.Option(None, help="Make the replay server answer 429 above this rate."),
+    rate: float = typer.Option(None, help="Client token-bucket rate per host, e.g. 5 for the HTTP_RATE default; off if unset."),
+):
+    """Latency and throughput of the whole scrape path against the local replay server."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from bot import client, letterboxd
+    from bot.client import get_settings, limiter_stats
+    from bot.metrics import percentile
+    from bot.replay import ReplayServer
+    from bot.utils import fetch_image, fetch_poster
+
+    get_settings().cache_enabled = False
+    # sin --rate se mide el código y no el limitador: con el de serie concurrente y secuencial empatan
+    get_settings().http_rate = rate if rate is not None else 1e9
+    get_settings().http_host_rates = {}
+
+    def scrape_once(executor):
+        film_url = letterboxd._random_film_choice()
+        slug = letterboxd.film_slug(film_url)
+        if executor is None:
+            movie = letterboxd.get_random_movie(film_url)
+            fetch_poster(slug, letterboxd.poster_endpoint(slug))
+        else:
+            poster_job = executor.submit(fetch_poster, slug, letterboxd.poster_endpoint(slug))
+            movie = letterboxd.get_random_movie(film_url, executor=executor)
+            poster_job.result()
+        fetch_image(str(movie.reviews[0].reviewer_pic))
+
+    with ReplayServer(fixtures, latency=latency, max_rps=max_rps) as server:
+        letterboxd.BASE = server.url
+        print(f"replay server {server.url}, {latency * 1000:.0f} ms latency"
+              + (f", 429 above {max_rps:g} req/s" if max_rps else "")
+              + (f", client limited to {rate:g} req/s" if rate is not None else ", client limiter off"))
+        for mode in ("sequential", "concurrent"):
+            client._limiters.clear()
+            requests_before, throttled_before = server.requests, server.throttled
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                executor = pool if mode == "concurrent" else None
+                start = time.perf_counter()
+                samples = _timeit(lambda: scrape_once(executor), runs)
+                elapsed = time.perf_counter() - start
+            print(f"{mode:<11} p50 {statistics.median(samples) * 1000:7.1f} ms  "
+                  f"p95 {percentile(samples, 0.95) * 1000:7.1f} ms  "
+                  f"{runs / elapsed:5.2f} scrapes/s  {(server.requests - requests_before) / runs:.1f} requests/scrape  "
+                  f"{server.throttled - throttled_before} x 429")
+            for host, stats in limiter_stats().items():
+                print(f"  {host}: {stats}")
+                if stats["wait_s"] > 0.1 * elapsed:
+                    print(f"  limited by the client rate: requests waited {stats['wait_s']:.1f}s on it in a {elapsed:.1f}s run")
+
+
+def _importtime(args: list[str]) -> tuple[int, list[tuple[int, int, int, str]]]:
+    """Cold-start a fresh interpreter with -X importtime; returns (top-level total us, rows)."""
+    import os
+    import subprocess
+    import sys
+
+    env = {**os.environ, "PYTHONPATH": "letterbotxd"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True, env=env)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    # site lo importa el intérprete antes del script (.pth de site-packages); no es coste de la CLI
+    return sum(cumulative for _, cumulative, depth, name in rows if depth == 0 and name != "site"), rows
+
+
+@app.command()
+def startup(
+    target: str = typer.Argument("--help", help="CLI arguments to cold-start, or a module with --module."),
+    module: bool = typer.Option(False, "--module", help="Profile `import TARGET` instead of the CLI."),
+    budget_ms: float = typer.Option(None, help="Fail above this import time (default: STARTUP_BUDGET_MS)."),
+    runs: int = typer.Option(3, help="Cold starts; the fastest one is reported."),
+    top: int = typer.Option(15, help="Slowest modules to list."),
+):
+    """Import cost per module of a cold start, checked against a budget."""
+    import shlex
+
+    from bot.config import Settings
+
+    budget_ms = Settings().startup_budget_ms if budget_ms is None else budget_ms
+    args = ["-c", f"import {target}"] if module else ["letterbotxd/letterbotxd.py", *shlex.split(target)]
+    total_us, rows = min((_importtime(args) for _ in range(runs)), key=lambda result: result[0])
+
+    print(f"{'self ms':>8} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, depth, name in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"{self_us / 1000:8.1f} {cumulative_us / 1000:9.1f}  {'  ' * depth}{name}")
+
+    total_ms = total_us / 1000
+    print(f"imports {total_ms:.1f} ms over {len(rows)} modules, budget {budget_ms:.0f} ms")
+    if total_ms > budget_ms:
+        print(f"over budget by {total_ms - budget_ms:.1f} ms")
+        raise typer.Exit(1)
+
+
+@app.command()
+def picks(
+    movies: int = typer.Option(6, help="Movies to pick a review for."),
+    latency: float = typer.Option(0.3, help="Simulated LLM round-trip, in seconds."),
+):
+    """LLM round-trips for one-by-one, batched and cached review picks, against the fake genai client."""
+    import tempfile
+
+    from parsel import Selector
+
+    from bot.fakes import FakeGenaiClient
+    from bot.gemini import GeminiWrapper
+    from bot.letterboxd import _parse_reviews
+    from bot.models import Movie
+    from bot.pick_cache import PickCache
+
+    pages = sorted((FIXTURES / "reviews").glob("*.html"))
+    review_sets = [_parse_reviews(Selector(text=page.read_text(encoding="utf-8")), 10) for page in pages]
+
+    def build():
+        return [
+            Movie(
+                url=f"https://letterboxd.com/film/fixture-{n}/", title=f"Fixture {n}", year=2020,
+                director="Some One", duration=100, image_url="https://letterboxd.com/ajax/poster/film/fixture/",
+                reviews=[review.model_copy() for review in review_sets[n % len(review_sets)]],
+            )
+            for n in range(movies)
+        ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PickCache(Path(tmp) / "picks.sqlite3")
+        client = FakeGenaiClient(latency=latency)
+        runs = {
+            "single": lambda: [GeminiWrapper(client=client).pick_best_review(movie) for movie in build()],
+            "batch": lambda: GeminiWrapper(client=client, cache=cache).pick_best_reviews(build()),
+            "cached": lambda: GeminiWrapper(client=client, cache=cache).pick_best_reviews(build()),
+        }
+        results = {}
+        for name, run in runs.items():
+            calls = client.calls
+            start = time.perf_counter()
+            results[name] = [review.text for review in run()]
+            print(f"{name:<10} {client.calls - calls:3d} calls  {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    if len({tuple(texts) for texts in results.values()}) != 1:
+        print("Picks differ between modes")
+        raise typer.Exit(1)
+    print(f"{movies} movies, same picks in every mode")
+
+
+@app.command()
+def outbox(
+    posts: int = typer.Option(50, help="Posts to enqueue."),
+    failure_rate: float = typer.Option(0.2, help="Share of Graph requests that fail."),
+    drop_rate: float = typer.Option(0.1, help="Share of uploads published without a response."),
+    rate_limit: int = typer.Option(40, help="Graph requests per second before rate limiting."),
+):
+    """Drain an outbox against the fake Graph API and check every post went out exactly once."""
+    import contextlib
+    import io
+    import tempfile
+
+    from bot.fakes import FakeGraphServer
+    from bot.fb import FaceAPI
+    from bot.outbox import Outbox
+
+    image = (FIXTURES / "images" / "avatar.jpg").read_bytes()
+    with tempfile.TemporaryDirectory() as tmp, FakeGraphServer(
+        failure_rate=failure_rate, drop_rate=drop_rate, rate_limit=rate_limit, window=0.5,
+    ) as server:
+        box = Outbox(tmp, max_attempts=50, backoff=0.01, max_backoff=0.1, rate_limit_backoff=0.5)
+        for n in range(posts):
+            box.add(f"post-{n:04d}", image, f"Fixture post {n}", f"Comment {n}")
+        fb_api = FaceAPI("fake-token", graph_url=server.url, timeout=5)
+
+        start = time.perf_counter()
+        rounds = rate_limited = 0
+        while box.pending() and rounds < 1000:
+            rounds += 1
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary = box.drain(fb_api)
+            rate_limited += summary["rate_limited"]
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+        commented = sum(1 for post in server.posts.values() if post["comments"])
+        print(f"{posts} posts in {elapsed:.2f}s over {rounds} drains, {server.requests} Graph requests")
+        print(f"server errors {server.failures}, dropped responses {server.dropped}, rate limited {server.rate_limited} ({rate_limited} drains paused)")
+        print(f"published {len(server.posts)}, with comment {commented}, duplicates {server.duplicates()}, outbox {box.stats()}")
+        if server.duplicates() or len(server.posts) != posts or box.pending():
+            raise typer.Exit(1)
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from bot.fsutil import write_atomic
+
+if TYPE_CHECKING:
+    import httpx
+
+# TTL (segundos) por tipo de recurso; pasado el TTL se revalida con un GET condicional
+DEFAULT_TTLS = {
+    "listing": 60 * 60,
+    "film": 24 * 60 * 60,
+    "reviews": 60 * 60,
+    "poster": 30 * 24 * 60 * 60,
+    "image": 30 * 24 * 60 * 60,
+    "avatar": 7 * 24 * 60 * 60,
+}
+
+# Cabeceras que se guardan junto al cuerpo
+KEPT_HEADERS = ("content-type", "etag", "last-modified")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+STAT_NAMES = ("hits", "revalidated", "misses", "stored", "evicted", "bytes_saved", "bytes_downloaded")
+
+
+class HttpCache:
+    """
+    Caché HTTP en disco. Los cuerpos se guardan por su sha256 (dos URLs con el
+    mismo contenido comparten fichero) y el índice vive en SQLite.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int, ttls: dict[str, int] | None = None):
+        self.root = Path(root)
+        self.blobs = self.root / "blobs"
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.root / "index.sqlite3", check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    # Blobs
+    def _blob_path(self, digest: str) -> Path:
+        return self.blobs / digest[:2] / digest
+
+    def _count(self, **deltas: int) -> None:
+        self._db.executemany(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            list(deltas.items()),
+        )
+
+    # Lookup
+    def lookup(self, url: str) -> sqlite3.Row | None:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM entries WHERE url = ?", (url,)).fetchone()
+        if row is not None and not self._blob_path(row["digest"]).exists():
+            return None
+        return row
+
+    def is_fresh(self, entry: sqlite3.Row) -> bool:
+        ttl = self.ttls.get(entry["kind"], 0)
+        return time.time() - entry["fetched_at"] < ttl
+
+    def validators(self, entry: sqlite3.Row) -> dict[str, str]:
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _response(self, entry: sqlite3.Row, url: str) -> httpx.Response | None:
+        # httpx pesa ~60 ms: `letterbotxd cache` solo mira la base de datos
+        import httpx
+
+        # Otro proceso puede haber borrado el blob después de lookup(): se trata como fallo
+        try:
+            content = self._blob_path(entry["digest"]).read_bytes()
+        except FileNotFoundError:
+            return None
+        headers = {"X-Cache": "HIT"}
+        for name in KEPT_HEADERS:
+            value = entry[name.replace("-", "_")]
+            if value:
+                headers[name] = value
+        return httpx.Response(
+            200,
+            content=content,
+            headers=headers,
+            request=httpx.Request("GET", url),
+        )
+
+    def hit(self, entry: sqlite3.Row, url: str) -> httpx.Response | None:
+        """Cached response for a fresh entry, or None if its blob is gone."""
+        cached = self._response(entry, url)
+        if cached is None:
+            return None
+        with self._lock, self._db:
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._count(hits=1, bytes_saved=entry["size"])
+        return cached
+
+    def revalidated(self, entry: sqlite3.Row, url: str, response: httpx.Response) -> httpx.Response | None:
+        """Cached response after a 304, or None if its blob is gone (refetch without validators)."""
+        cached = self._response(entry, url)
+        if cached is None:
+            return None
+        now = time.time()
+        etag = response.headers.get("etag") or entry["etag"]
+        last_modified = response.headers.get("last-modified") or entry["last_modified"]
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE entries SET fetched_at = ?, accessed_at = ?, etag = ?, last_modified = ? WHERE url = ?",
+                (now, now, etag, last_modified, url),
+            )
+            self._count(revalidated=1, bytes_saved=entry["size"])
+        return cached
+
+    # Store
+    def store(self, url: str, kind: str, response: httpx.Response) -> None:
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        now = time.time()
+        with self._lock, self._db:
+            # Dentro del lock para que _drop_blob de otro hilo no lo borre antes de indexarlo
+            if not path.exists():
+                write_atomic(path, body)
+            old = self._db.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url, kind, digest, size, content_type, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url, kind, digest, len(body),
+                    response.headers.get("content-type"),
+                    response.headers.get("etag"),
+                    response.headers.get("last-modified"),
+                    now, now,
+                ),
+            )
+            self._count(misses=1, stored=1, bytes_downloaded=len(body))
+            if old is not None and old["digest"] != digest:
+                self._drop_blob(old["digest"])
+            self._evict()
+
+    # LRU
+    def _drop_blob(self, digest: str) -> None:
+        used = self._db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if used is None:
+            self._blob_path(digest).unlink(missing_ok=True)
+
+    def _total_bytes(self) -> int:
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, digest FROM entries ORDER BY accessed_at").fetchall()
+        for row in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE url = ?", (row["url"],))
+            before = self._blob_path(row["digest"]).exists()
+            self._drop_blob(row["digest"])
+            if before and not self._blob_path(row["digest"]).exists():
+                total = self._total_bytes()
+            self._count(evicted=1)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT name, value FROM stats").fetchall()
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size = self._total_bytes()
+        stats = {name: 0 for name in STAT_NAMES}
+        stats.update({row["name"]: row["value"] for row in rows})
+        stats["entries"] = entries
+        stats["size_bytes"] = size
+        return stats
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            for row in self._db.execute("SELECT DISTINCT digest FROM entries").fetchall():
+                self._blob_path(row["digest"]).unlink(missing_ok=True)
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM stats")
@@ -0,0 +1,229 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+from bot.cache import HttpCache
+from bot.config import Settings
+from bot import timing
+from bot.ratelimit import HostLimiter
+from bot.replay import Recorder
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (compatible; Letterbotxd/0.1; +https://github.com/SebasXeon/Letterbotxd)"
+    ),
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+# Respuestas que vale la pena reintentar
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_client: httpx.Client | None = None
+_settings: Settings | None = None
+_cache: HttpCache | None = None
+_recorder: Recorder | None = None
+_lock = threading.Lock()
+_limiters: dict[str, HostLimiter] = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+# Shared keep-alive client, one per process
+def get_client() -> httpx.Client:
+    global _client
+    with _lock:
+        if _client is None:
+            settings = get_settings()
+            http2 = settings.http2
+            if http2 and not _http2_available():
+                print("http2 requested but the 'h2' package is not installed, using HTTP/1.1")
+                http2 = False
+            _client = httpx.Client(
+                headers=HEADERS,
+                http2=http2,
+                follow_redirects=True,
+                timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry,
+                ),
+            )
+        return _client
+
+
+def close_client() -> None:
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+# Un limitador por host (letterboxd.com, el CDN de imágenes...); todo fetch pasa por él
+def get_limiter(url: str) -> HostLimiter:
+    host = urlsplit(url).netloc
+    with _lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            settings = get_settings()
+            limiter = HostLimiter(
+                rate=settings.http_host_rates.get(host, settings.http_rate),
+                burst=settings.http_burst,
+                max_concurrency=settings.http_max_connections_per_host,
+                target_latency=settings.http_target_latency,
+            )
+            _limiters[host] = limiter
+        return limiter
+
+
+def limiter_stats() -> dict[str, dict]:
+    with _lock:
+        limiters = dict(_limiters)
+    return {host: limiter.stats() for host, limiter in limiters.items()}
+
+
+def _retry_after(response: httpx.Response | None) -> float | None:
+    # Retry-After puede venir en segundos o como fecha HTTP
+    value = response.headers.get("Retry-After", "").strip() if response is not None else ""
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(response: httpx.Response | None, attempt: int, backoff: float) -> float:
+    retry_after = _retry_after(response)
+    if retry_after is not None:
+        return retry_after
+    return backoff * (2 ** attempt)
+
+
+# Graba cada respuesta en un directorio de fixtures (ver bot/replay.py)
+def start_recording(root: str) -> Recorder:
+    global _recorder
+    _recorder = Recorder(root)
+    return _recorder
+
+
+def stop_recording() -> None:
+    global _recorder
+    _recorder = None
+
+
+def get_cache() -> HttpCache | None:
+    global _cache
+    settings = get_settings()
+    if not settings.cache_enabled:
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = HttpCache(settings.cache_dir, settings.cache_max_bytes)
+        return _cache
+
+
+def _get(url: str, headers: dict | None, timeout: float | None) -> httpx.Response:
+    settings = get_settings()
+    client = get_client()
+    kwargs = {"headers": headers}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    attempt = 0
+    while True:
+        response = None
+        limiter = get_limiter(url)
+        limiter.acquire()
+        start = time.monotonic()
+        try:
+            try:
+                response = client.get(url, **kwargs)
+            finally:
+                failed = response is None or response.status_code in RETRY_STATUS
+                limiter.release(time.monotonic() - start, ok=not failed, retry_after=_retry_after(response) if failed else None)
+            if response.status_code == 304:
+                return response
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return response
+        except httpx.TransportError:
+            if attempt >= settings.http_retries:
+                raise
+        if attempt >= settings.http_retries:
+            response.raise_for_status()
+        time.sleep(_retry_delay(response, attempt, settings.http_backoff))
+        attempt += 1
+
+
+def fetch(
+    url: str,
+    *,
+    headers: dict | None = None,
+    timeout: float | None = None,
+    kind: str | None = None,
+) -> httpx.Response:
+    """
+    GET con reintentos y backoff exponencial. Lanza httpx.HTTPStatusError en 4xx/5xx.
+    Con `kind` (listing, film, reviews, poster, image, avatar) la respuesta pasa
+    por la caché en disco y se revalida con ETag / Last-Modified al caducar.
+    """
+    response = _fetch(url, headers, timeout, kind)
+    if _recorder is not None:
+        _recorder.record(url, response)
+    return response
+
+
+def _fetch(url: str, headers: dict | None, timeout: float | None, kind: str | None) -> httpx.Response:
+    label = kind or "other"
+    timing.count("requests", label)
+    cache = get_cache() if kind else None
+    entry = None
+    conditional = headers
+    if cache is not None:
+        entry = cache.lookup(url)
+        if entry is not None:
+            if cache.is_fresh(entry):
+                response = cache.hit(entry, url)
+                if response is not None:
+                    timing.count("cache_hits", label)
+                    timing.count("fetch_bytes", label, len(response.content))
+                    return response
+            else:
+                conditional = {**(headers or {}), **cache.validators(entry)}
+
+    response = _get(url, conditional, timeout)
+    if cache is not None:
+        cached = None
+        if response.status_code == 304 and entry is not None:
+            cached = cache.revalidated(entry, url, response)
+            if cached is None:
+                # El blob desapareció mientras tanto: se pide entero
+                response = _get(url, headers, timeout)
+        if cached is not None:
+            timing.count("cache_revalidated", label)
+            response = cached
+        else:
+            cache.store(url, kind, response)
+    timing.count("fetch_bytes", label, len(response.content))
+    return response
@@ -6,4 +6,67 @@ class Settings(BaseSettings):
 
     log_level: int = 10
     gemini_api_key: str = ""
-    page_access_token: str = ""
\ No newline at end of file
+    page_access_token: str = ""
+
+    # Facebook (graph_url vacío = Graph API real; ver bot/fakes.py para uno local)
+    graph_url: str = ""
+    graph_timeout: float = 30.0
+    outbox_dir: str = "temp/outbox"
+    outbox_max_attempts: int = 8
+    outbox_backoff: float = 60.0
+    outbox_max_backoff: float = 3600.0
+    outbox_rate_limit_backoff: float = 900.0
+
+    # Letterboxd (se puede apuntar a un servidor local de fixtures, ver bot/replay.py)
+    letterboxd_base: str = "https://letterboxd.com"
+
+    # HTTP client
+    http_timeout: float = 15.0
+    http_connect_timeout: float = 5.0
+    http_max_connections: int = 20
+    http_max_connections_per_host: int = 6
+    http_keepalive_expiry: float = 30.0
+    # Por host: token bucket (peticiones/s, ráfaga) y concurrencia adaptativa hasta max_connections_per_host.
+    # 5/s es a propósito, por cortesía con Letterboxd: un post son ~7 peticiones, así que pasada la ráfaga
+    # cada post extra de un prefetch cuesta ~1.4 s aunque vaya en paralelo. Para ir más rápido, HTTP_RATE
+    # o HTTP_HOST_RATES; `bench scrape --rate` enseña cuánto se espera al limitador.
+    http_rate: float = 5.0
+    http_burst: int = 10
+    http_host_rates: dict[str, float] = {}  # p. ej. {"a.ltrbxd.com": 20}
+    http_target_latency: float = 2.0
+    http_retries: int = 3
+    http_backoff: float = 0.5
+    http2: bool = False
+
+    # HTTP cache
+    cache_enabled: bool = True
+    cache_dir: str = "temp/cache/http"
+    cache_max_bytes: int = 256 * 1024 * 1024
+
+    # Pipeline
+    concurrent_fetch: bool = True
+    workspace_root: str = "temp/runs"
+    pick_cache_path: str = "temp/cache/picks.sqlite3"
+    # Historial de lo publicado: películas y reviewers no se repiten dentro de su cooldown
+    history_path: str = "temp/history.sqlite3"
+    film_cooldown_days: float = 90
+    reviewer_cooldown_days: float = 14
+    # Posts preparados por adelantado (comando prefetch) que publish solo tiene que subir
+    prefetch_dir: str = "temp/prefetch"
+    prefetch_depth: int = 3
+    prefetch_max_age_hours: float = 12
+    # Si el ranker local gana por este margen no se pregunta a Gemini
+    ranker_margin: float = 0.35
+    gemini_timeout: float = 20.0
+
+    # Métricas por run: runs.jsonl + un .prom por comando para el textfile collector ("" = desactivado)
+    metrics_dir: str = "temp/metrics"
+
+    # Render
+    fast_blur: bool = True
+    background_cache_dir: str = "temp/cache/backgrounds"
+    # Pósters ya escalados y recortados para el layout, por slug ("" = sin caché)
+    poster_cache_dir: str = "temp/cache/posters"
+
+    # Startup: typer (+rich) son ~200 ms y pydantic-settings ~150 ms, y casi todo comando lee Settings
+    startup_budget_ms: float = 400.0
@@ -0,0 +1,204 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+RE_MOVIE = re.compile(r"^Movie (\d+):$", re.M)
+RE_REVIEW = re.compile(r"^(\d+)\. (.*)$", re.M)
+RE_FORM_MESSAGE = re.compile(rb'name="message"\r\n\r\n(.*?)\r\n--', re.S)
+
+
+class FakeModels:
+    def __init__(self, owner: "FakeGenaiClient"):
+        self.owner = owner
+
+    def generate_content(self, model, contents, config=None):
+        owner = self.owner
+        with owner._lock:
+            owner.calls += 1
+            owner.prompts.append(contents)
+        if owner.latency:
+            time.sleep(owner.latency)
+
+        schema = (config or {}).get("response_schema")
+        if schema is not None and "picks" in schema.model_fields:
+            sections = RE_MOVIE.split(contents)[1:]
+            picks = [
+                {"movie": int(number), **owner.pick(RE_REVIEW.findall(section))}
+                for number, section in zip(sections[::2], sections[1::2])
+            ]
+            return SimpleNamespace(text=json.dumps({"picks": picks}))
+        return SimpleNamespace(text=json.dumps(owner.pick(RE_REVIEW.findall(contents))))
+
+
+class FakeGenaiClient:
+    """
+    Stand-in for `genai.Client` with the same `client.models.generate_content`
+    shape. Picks the longest review (first line only, as read from the prompt),
+    counts calls and keeps the prompts it got.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.prompts: list[str] = []
+        self._lock = threading.Lock()
+        self.models = FakeModels(self)
+
+    def pick(self, reviews: list[tuple[str, str]]) -> dict:
+        number, text = max(reviews, key=lambda review: len(review[1]))
+        return {"index": int(number), "text": text}
+
+
+class FakeGraphServer:
+    """
+    Local stand-in for the bits of the Graph API that FaceAPI uses: photo
+    upload, comments and the page's recent posts. It can fail at random, drop
+    the response after publishing (the case the outbox has to handle without
+    duplicating) and answer with a rate-limit error past `rate_limit` requests
+    per `window` seconds. Point FaceAPI(graph_url=server.url) at it.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        rate_limit: int | None = None,
+        window: float = 1.0,
+        latency: float = 0.0,
+        port: int = 0,
+    ):
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.rate_limit = rate_limit
+        self.window = window
+        self.latency = latency
+        self.posts: dict[str, dict] = {}
+        self.requests = 0
+        self.failures = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self._window_start = time.monotonic()
+        self._window_requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def duplicates(self) -> int:
+        messages = [post["message"] for post in self.posts.values()]
+        return len(messages) - len(set(messages))
+
+    def _admit(self) -> str | None:
+        # None = atender; si no, el tipo de fallo a simular
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start, self._window_requests = now, 0
+            self._window_requests += 1
+            if self.rate_limit is not None and self._window_requests > self.rate_limit:
+                self.rate_limited += 1
+                return "rate_limit"
+            if random.random() < self.failure_rate:
+                self.failures += 1
+                return "error"
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _json(self, status: int, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _fail(self, kind: str):
+                if kind == "rate_limit":
+                    self._json(400, {"error": {"message": "(#4) Application request limit reached", "type": "OAuthException", "code": 4}})
+                else:
+                    self._json(500, {"error": {"message": "An unexpected error has occurred.", "type": "OAuthException", "code": 2}})
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                if (kind := server._admit()) is not None:
+                    return self._fail(kind)
+                parts = urlsplit(self.path)
+                if not parts.path.endswith("/me/posts"):
+                    return self._json(404, {"error": {"message": "Unknown path", "code": 803}})
+                query = parse_qs(parts.query)
+                since = float(query.get("since", ["0"])[0])
+                limit = int(query.get("limit", ["25"])[0])
+                with server._lock:
+                    recent = [(post_id, post) for post_id, post in server.posts.items() if post["created_time"] >= since]
+                data = [{"id": post_id, "message": post["message"]} for post_id, post in reversed(recent)]
+                self._json(200, {"data": data[:limit]})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if server.latency:
+                    time.sleep(server.latency)
+                if (kind := server._admit()) is not None:
+                    return self._fail(kind)
+
+                path = urlsplit(self.path).path
+                if path.endswith("/me/photos"):
+                    match = RE_FORM_MESSAGE.search(body)
+                    message = match.group(1).decode("utf-8") if match else ""
+                    with server._lock:
+                        post_id = f"1000_{len(server.posts) + 1}"
+                        server.posts[post_id] = {"message": message, "bytes": len(body), "comments": [], "created_time": time.time()}
+                        drop = random.random() < server.drop_rate
+                        if drop:
+                            server.dropped += 1
+                    if drop:
+                        # publicado, pero el cliente nunca ve la respuesta
+                        self.close_connection = True
+                        return
+                    return self._json(200, {"id": post_id.split("_")[1], "post_id": post_id})
+
+                if path.endswith("/comments"):
+                    post_id = path.rstrip("/").split("/")[-2]
+                    fields = parse_qs(body.decode("utf-8"))
+                    with server._lock:
+                        if post_id not in server.posts:
+                            return self._json(400, {"error": {"message": "Unsupported post request", "code": 100}})
+                        server.posts[post_id]["comments"].append(fields.get("message", [""])[0])
+                    return self._json(200, {"id": f"{post_id}_c{len(server.posts[post_id]['comments'])}"})
+
+                self._json(404, {"error": {"message": "Unknown path", "code": 803}})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeGraphServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
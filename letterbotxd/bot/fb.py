@@ -1,14 +1,36 @@
+from io import BytesIO
+from pathlib import Path
+
 import facebook
 
 
 class FaceAPI:
-    def __init__(self, token):
+    def __init__(self, token, graph_url: str | None = None, timeout: float | None = None):
         self.token = token
-        self.graph = facebook.GraphAPI(access_token=token, version="2.12")
+        if graph_url:
+            # facebook-sdk arma las URLs con esta constante del módulo (p. ej. un Graph falso local)
+            facebook.FACEBOOK_GRAPH_URL = graph_url.rstrip("/") + "/"
+        self.graph = facebook.GraphAPI(access_token=token, version="2.12", timeout=timeout)
 
-    def post(self, message, image):
-        response = self.graph.put_photo(image=open(image, 'rb'), message=message)
+    def post(self, message, image: bytes | str | Path):
+        # image: PNG ya codificado en memoria o ruta a un fichero
+        if isinstance(image, (bytes, bytearray)):
+            response = self.graph.put_photo(image=BytesIO(image), message=message)
+        else:
+            with open(image, 'rb') as f:
+                response = self.graph.put_photo(image=f, message=message)
         return response['post_id']
 
     def comment_post(self, post_id, message):
-        self.graph.put_object(parent_object=f"{post_id}", connection_name='comments', message=message)
\ No newline at end of file
+        self.graph.put_object(parent_object=f"{post_id}", connection_name='comments', message=message)
+
+    def find_post(self, message, since: float | None = None, limit: int = 100) -> str | None:
+        # Busca entre los posts de la página (desde `since`, unix time) uno con este mensaje
+        args = {"fields": "message", "limit": limit}
+        if since is not None:
+            args["since"] = int(since)
+        posts = self.graph.get_connections("me", "posts", **args)
+        for post in posts.get("data", []):
+            if post.get("message") == message:
+                return post["id"]
+        return None
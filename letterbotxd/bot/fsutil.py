@@ -0,0 +1,49 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_atomic(path: str | Path, data: bytes) -> None:
+    """
+    Write `data` to `path` through a temp file of its own in the same
+    directory, so concurrent writers (threads or processes) never share one.
+    If another writer replaced `path` first and ours can't, theirs stays.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            if not path.exists():
+                raise
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def prune_dir(root: str | Path, max_bytes: int, pattern: str = "*") -> int:
+    """
+    Delete the least recently used files matching `pattern` (by access time;
+    readers touch what they use) until `root` holds at most `max_bytes`.
+    Returns how many were deleted.
+    """
+    files = []
+    for path in Path(root).glob(pattern):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # otro proceso lo acaba de borrar
+        files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        deleted += 1
+    return deleted
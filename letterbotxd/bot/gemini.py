@@ -1,47 +1,129 @@
 import json
 from google import genai
 from pydantic import BaseModel
+from bot.letterboxd import film_slug
 from bot.models import Movie, Review
+from bot.pick_cache import PickCache, pick_key
+
+MODEL = "gemini-2.0-flash"
+# Subir cuando cambie el prompt: invalida las elecciones cacheadas
+PROMPT_VERSION = 1
+
+INSTRUCTIONS = "choose a review either funny or serious. Censor bad words(drugs, sex, etc) changing a letter with * \n"
 
 class ResponseSchema(BaseModel):
     index: int
     text: str
 
 
+class MoviePick(BaseModel):
+    movie: int
+    index: int
+    text: str
+
+
+class BatchResponseSchema(BaseModel):
+    picks: list[MoviePick]
+
+
+def _describe(movie: Movie) -> str:
+    return (
+        f"Title: {movie.title} ({movie.year})\n"
+        f"Directed by {movie.director}\n"
+        f"Description: {movie.description}\n"
+        f"Reviews:\n"
+        + "\n".join(f"{i+1}. {review.text}" for i, review in enumerate(movie.reviews))
+    )
+
+
 class GeminiWrapper:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, client=None, cache: PickCache | None = None, timeout: float | None = None):
         self.api_key = api_key
-        self.client = genai.Client(api_key=self.api_key)
+        # `client` permite inyectar un cliente falso (bot.fakes.FakeGenaiClient)
+        http_options = {'timeout': int(timeout * 1000)} if timeout else None
+        self.client = client or genai.Client(api_key=self.api_key, http_options=http_options)
+        self.cache = cache
 
-    def pick_best_review(self, movie: Movie) -> Review:
-        if not movie.reviews:
-            raise ValueError("No reviews available for the movie.")
+    def _key(self, movie: Movie) -> str:
+        return pick_key(film_slug(str(movie.url)), [review.text for review in movie.reviews], PROMPT_VERSION)
 
-        # Prepare the prompt for Gemini
-        prompt = (
-            f"Choose the best review for this movie, choose a review either funny or serious. Censor bad words(drugs, sex, etc) changing a letter with * \n"
-            f"Title: {movie.title} ({movie.year})\n"
-            f"Directed by {movie.director}\n"
-            f"Description: {movie.description}\n"
-            f"Reviews:\n"
-            + "\n".join(f"{i+1}. {review.text}" for i, review in enumerate(movie.reviews))
-        )
+    def _apply(self, movie: Movie, number: int, text: str) -> Review:
+        # `number` empieza en 1, como en el prompt
+        if not 1 <= number <= len(movie.reviews):
+            raise ValueError(f"Gemini picked review {number} of {len(movie.reviews)} for {movie.title}")
+        key = self._key(movie)
+        picked_review = movie.reviews[number - 1]
+        picked_review.text = text
+        if self.cache is not None:
+            self.cache.put(key, film_slug(str(movie.url)), number - 1, text)
+        return picked_review
 
-        # Call Gemini to get the best review
+    def cached_pick(self, movie: Movie) -> Review | None:
+        if self.cache is None or not movie.reviews:
+            return None
+        hit = self.cache.get(self._key(movie))
+        if hit is None or hit[0] >= len(movie.reviews):
+            return None
+        index, text = hit
+        picked_review = movie.reviews[index]
+        picked_review.text = text
+        return picked_review
+
+    def _generate(self, prompt: str, schema: type[BaseModel]) -> dict:
         response = self.client.models.generate_content(
-            model='gemini-2.0-flash',
+            model=MODEL,
             contents=prompt,
             #max_output_tokens=100,
             #temperature=0.5
             config={
                 'response_mime_type': 'application/json',
-                'response_schema': ResponseSchema,
+                'response_schema': schema,
             },
         )
+        return json.loads(response.text)
+
+    def pick_best_review(self, movie: Movie) -> Review:
+        if not movie.reviews:
+            raise ValueError("No reviews available for the movie.")
+
+        cached = self.cached_pick(movie)
+        if cached is not None:
+            return cached
+
+        # Prepare the prompt for Gemini
+        prompt = f"Choose the best review for this movie, {INSTRUCTIONS}" + _describe(movie)
+
+        # Call Gemini to get the best review
+        respon_data = self._generate(prompt, ResponseSchema)
+        return self._apply(movie, respon_data['index'], respon_data['text'])
 
-        respon_data = json.loads(response.text)
+    def pick_best_reviews(self, movies: list[Movie]) -> list[Review]:
+        """
+        Picks for several movies in a single request; the ones already cached
+        don't go in the prompt. Movies the response misses fall back to
+        `pick_best_review`.
+        """
+        if any(not movie.reviews for movie in movies):
+            raise ValueError("No reviews available for some of the movies.")
 
-        picked_review = movie.reviews[respon_data['index'] - 1]
-        picked_review.text = respon_data['text']
+        picks: list[Review | None] = [self.cached_pick(movie) for movie in movies]
+        pending = [i for i, pick in enumerate(picks) if pick is None]
+        if len(pending) == 1:
+            picks[pending[0]] = self.pick_best_review(movies[pending[0]])
+        elif pending:
+            prompt = (
+                f"Choose the best review for each of these movies, {INSTRUCTIONS}"
+                f"Answer with one pick per movie, using the movie number.\n\n"
+                + "\n\n".join(f"Movie {n}:\n{_describe(movies[i])}" for n, i in enumerate(pending, start=1))
+            )
+            respon_data = BatchResponseSchema.model_validate(self._generate(prompt, BatchResponseSchema))
+            for pick in respon_data.picks:
+                if not 1 <= pick.movie <= len(pending) or picks[pending[pick.movie - 1]] is not None:
+                    continue
+                i = pending[pick.movie - 1]
+                try:
+                    picks[i] = self._apply(movies[i], pick.index, pick.text)
+                except ValueError:
+                    pass
 
-        return picked_review
\ No newline at end of file
+        return [pick if pick is not None else self.pick_best_review(movie) for pick, movie in zip(picks, movies)]
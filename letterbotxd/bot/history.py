@@ -0,0 +1,77 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from bot.letterboxd import film_slug
+from bot.models import Movie
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL,
+    title TEXT,
+    review_id TEXT,
+    reviewer TEXT,
+    posted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_slug ON posts (slug, posted_at);
+CREATE INDEX IF NOT EXISTS posts_reviewer ON posts (reviewer, posted_at);
+CREATE INDEX IF NOT EXISTS posts_review_id ON posts (review_id);
+CREATE INDEX IF NOT EXISTS posts_posted_at ON posts (posted_at);
+"""
+
+DAY = 24 * 60 * 60
+
+
+class PostHistory:
+    """
+    Every film/review we have posted, with its timestamp. The recent slugs and
+    reviewers are loaded once per run into sets, so checking a listing
+    candidate or a review costs a set lookup.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.executescript(SCHEMA)
+
+    def record(self, movie: Movie, posted_at: float | None = None) -> None:
+        review = movie.picked_review
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO posts (slug, title, review_id, reviewer, posted_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    film_slug(str(movie.url)),
+                    movie.title,
+                    review.id if review else None,
+                    review.reviewer if review else None,
+                    posted_at or time.time(),
+                ),
+            )
+
+    def _column_since(self, column: str, days: float) -> set[str]:
+        since = time.time() - days * DAY
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT DISTINCT {column} FROM posts WHERE posted_at >= ? AND {column} IS NOT NULL", (since,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def recent_slugs(self, days: float) -> set[str]:
+        return self._column_since("slug", days)
+
+    def recent_reviewers(self, days: float) -> set[str]:
+        return self._column_since("reviewer", days)
+
+    def review_ids(self) -> set[str]:
+        # Una reseña ya publicada no se repite nunca
+        with self._lock:
+            rows = self._db.execute("SELECT review_id FROM posts WHERE review_id IS NOT NULL").fetchall()
+        return {row[0] for row in rows}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
@@ -1,22 +1,23 @@
 import random
 import re
 import html
+from concurrent.futures import Executor
 from datetime import datetime
+from itertools import islice
+from typing import Container, Iterator
 from urllib.parse import urljoin
 
-import requests
+from lxml import etree
 from parsel import Selector
 
-from bot.models import Movie, Review
+from bot import timing
+from bot.client import fetch, get_settings
+from bot.models import Movie, Review, ReviewFilter
 
 # Setup 
-BASE = "https://letterboxd.com"
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (compatible; Letterbotxd/0.1; +https://github.com/SebasXeon/Letterbotxd)"
-    ),
-    "X-Requested-With": "XMLHttpRequest",
-}
+# None = LETTERBOXD_BASE; bench y replay lo apuntan al servidor local. Se lee al usarlo: importar
+# el módulo no debe construir Settings (ver `bench startup`)
+BASE: str | None = None
 
 # Mapas de órdenes posibles → endpoint AJAX
 LISTINGS = [
@@ -28,39 +29,76 @@ LISTINGS = [
     "by/rating-lowest/",
 ]
 
+# Órdenes de las reseñas de una película; "popular" es el orden por likes de Letterboxd
+REVIEW_SORTS = {
+    "activity": "by/activity/",
+    "popular": "",
+    "added": "by/added/",
+    "rating": "by/entry-rating/",
+}
+
+# Palabras muy frecuentes por idioma, para adivinar el idioma de una reseña sin dependencias
+STOPWORDS = {
+    "en": {"the", "and", "is", "it", "this", "of", "to", "was", "i", "that", "a", "in", "but", "movie", "film"},
+    "es": {"el", "la", "que", "de", "y", "es", "en", "un", "una", "los", "pero", "no", "lo", "película", "muy"},
+    "pt": {"o", "que", "de", "e", "é", "um", "uma", "não", "do", "da", "filme", "mas", "com", "muito", "eu"},
+    "fr": {"le", "la", "et", "est", "les", "un", "une", "de", "pas", "je", "que", "film", "mais", "ce", "des"},
+    "de": {"der", "die", "und", "ist", "das", "nicht", "ein", "eine", "ich", "es", "film", "aber", "zu", "mit", "den"},
+    "it": {"il", "la", "che", "di", "e", "è", "un", "una", "non", "per", "film", "ma", "lo", "mi", "con"},
+}
+
 
 # Utils
-def _get_selector(url: str) -> Selector:
-    r = requests.get(url, headers=HEADERS)
-    r.raise_for_status()
+def _get_selector(url: str, kind: str | None = None) -> Selector:
+    r = fetch(url, kind=kind)
     return Selector(text=r.text)
 
 
-def _clean(txt_list: list[str]) -> str:
-    return " ".join(t.strip() for t in txt_list if t and t.strip())
+def film_slug(film_url: str) -> str:
+    return film_url.rstrip("/").split("/")[-1]
 
 
-# Pick a random film URL from the listing URLs
-def _random_film_choice() -> str:
-    path = random.choice(LISTINGS)
-    ajax_url = f"{BASE}/films/ajax/{path}?esiAllowFilters=true"
+def base_url() -> str:
+    return (BASE or get_settings().letterboxd_base).rstrip("/")
 
-    sel = _get_selector(ajax_url)
-    items = sel.xpath("//li[contains(@class,'poster-container')]")
-    if not items:
-        raise RuntimeError("Letterboxd AJAX devolvió 0 películas")
 
-    li = random.choice(items)
+def poster_endpoint(slug: str) -> str:
+    return f"{base_url()}/ajax/poster/film/{slug}/std/1000x1500/"
 
-    slug = li.xpath(".//div/@data-film-slug").get().strip("/")
-    film_url = urljoin(BASE, f"/film/{slug}/")
 
-    return film_url
+def _clean(txt_list: list[str]) -> str:
+    return " ".join(t.strip() for t in txt_list if t and t.strip())
+
+
+# Pick a random film URL from the listing URLs
+# `exclude`: slugs en cooldown; se descartan antes de pedir la página de la película
+def _random_film_choice(exclude: Container[str] = frozenset(), attempts: int = 3) -> str:
+    base = base_url()
+    listings = random.sample(LISTINGS, min(attempts, len(LISTINGS)))
+    empty = 0
+    for path in listings:
+        ajax_url = f"{base}/films/ajax/{path}?esiAllowFilters=true"
+
+        sel = _get_selector(ajax_url, kind="listing")
+        items = sel.xpath("//li[contains(@class,'poster-container')]")
+        if not items:
+            # un listado vacío no descarta los demás
+            empty += 1
+            continue
+
+        slugs = [li.xpath(".//div/@data-film-slug").get().strip("/") for li in items]
+        candidates = [slug for slug in slugs if slug not in exclude]
+        if candidates:
+            return urljoin(base, f"/film/{random.choice(candidates)}/")
+
+    if empty == len(listings):
+        raise RuntimeError(f"Letterboxd AJAX devolvió 0 películas en {len(listings)} listados")
+    raise RuntimeError(f"Todas las películas de {len(listings)} listados están en cooldown ({empty} vacíos)")
 
 
 # Scrape movie details from the film URL
 def _scrape_movie(film_url: str) -> dict:
-    sel = _get_selector(film_url)
+    sel = _get_selector(film_url, kind="film")
 
     def xp(path: str) -> str | None:
         txt = sel.xpath(path + "/text()").get()
@@ -68,14 +106,13 @@ def _scrape_movie(film_url: str) -> dict:
     
     slug = sel.xpath(".//div/@data-film-slug").get().strip("/")
 
-
     title = xp('//h1/span')
     year_txt = sel.xpath('//section[1]//span/a/text()').re_first(r"\d{4}")
     director = xp('//section[1]/div/div/p/span[2]/a/span')
     description = xp('//section[2]/section/div[1]/div/p')
     duration = sel.xpath('//div[2]/div/div/div[2]/section[2]/p/text()').re_first(r"\d+")
     # /html/body/div[2]/div/div/div[1]/section[1]/a/div[1]/div/img
-    poster_url = (f"{BASE}/ajax/poster/film/{slug}/std/1000x1500/")
+    poster_url = poster_endpoint(slug)
 
     return dict(
         url=film_url,
@@ -88,79 +125,164 @@ def _scrape_movie(film_url: str) -> dict:
     )
 
 
+# Recorre un nodo del árbol ya parseado: <br> → salto de línea, <b>/<strong> → [b]...[/b]
+def _review_markup(node, out: list[str]) -> None:
+    if node.text:
+        out.append(node.text)
+    for child in node:
+        tag = child.tag if isinstance(child.tag, str) else None  # comentarios, PIs
+        if tag == "br":
+            out.append("\n")
+        elif tag in ("b", "strong"):
+            out.append("[b]")
+            _review_markup(child, out)
+            out.append("[/b]")
+        elif tag is not None:
+            _review_markup(child, out)
+        if child.tail:
+            out.append(child.tail)
+
+
+# XPaths relativas al <article>, compiladas una sola vez
+XP_ARTICLES = etree.XPath('//article[contains(@class,"production-viewing")]')
+XP_AVATAR_HREF = etree.XPath('.//a[contains(@class,"avatar")]/@href')
+XP_AVATAR_SRC = etree.XPath('.//a[contains(@class,"avatar")]/img/@src')
+XP_RATING = etree.XPath('.//span[contains(@class,"rating")]/text()')
+XP_DATE = etree.XPath('.//time/@datetime')
+# El número de likes va en data-count del <p class="like-link-target">
+XP_LIKES = etree.XPath('string(.//*[contains(@class,"like-link-target")]/@data-count)')
+XP_REVIEW_P = etree.XPath('.//div[contains(@class,"js-review-body")]//p')
+XP_SPOILER = etree.XPath('.//*[contains(@class,"spoiler")]')
+XP_NEXT_PAGE = etree.XPath('//div[contains(@class,"pagination")]//a[contains(@class,"next")]')
+RE_REVIEWER = re.compile(r"/([^/]+)/")
+RE_COUNT = re.compile(r"\d[\d,]*")
+RE_MARKUP = re.compile(r"\[/?b\]")
+RE_WORD = re.compile(r"\w+")
+
+
+def _first(values: list) -> str | None:
+    return str(values[0]) if values else None
+
+
+def _review_text(art) -> str:
+    review_lines = []
+    for p in XP_REVIEW_P(art):
+        out: list[str] = []
+        _review_markup(p, out)
+        for raw in "".join(out).splitlines():
+            clean = (html.unescape(raw)        # &nbsp; → ' '
+                    .replace("\xa0", " ")     # NBSP unicode → espacio normal
+                    .strip())
+            if clean:
+                review_lines.append(clean)
+    return "\n".join(review_lines)
+
+
+def _parse_review(art) -> Review:
+    href = _first(XP_AVATAR_HREF(art))
+    match = RE_REVIEWER.search(href) if href else None
+    reviewer = match.group(1) if match else "anon"
+    reviewer_pic = _first(XP_AVATAR_SRC(art))
+    rating_text = _first(XP_RATING(art))
+    if rating_text:
+        rating = rating_text.count('★') + 0.5 * rating_text.count('½')
+    else:
+        rating = 0
+    date_iso = _first(XP_DATE(art))
+    date = datetime.fromisoformat(date_iso) if date_iso else None
+    likes_txt = RE_COUNT.search(XP_LIKES(art))
+    likes = int(likes_txt.group().replace(",", "")) if likes_txt else None
+
+    return Review(
+        id=art.get("data-object-id"),
+        reviewer=reviewer,
+        reviewer_pic=reviewer_pic,
+        rating=rating,
+        date=date,
+        likes=likes,
+        text=_review_text(art),
+    )
+
+
+# Una sola pasada sobre el árbol ya parseado de la página de reseñas
+def _parse_reviews(sel: Selector, max_reviews=10) -> list[Review]:
+    return [_parse_review(art) for art in XP_ARTICLES(sel.root)[:max_reviews]]
+
+
+def _guess_language(text: str) -> str | None:
+    words = RE_WORD.findall(text.lower())
+    if not words:
+        return None
+    scores = {lang: sum(w in stop for w in words) for lang, stop in STOPWORDS.items()}
+    lang, score = max(scores.items(), key=lambda kv: kv[1])
+    return lang if score else None
+
+
+def _accepts(review: Review, filters: ReviewFilter) -> bool:
+    if review.reviewer in filters.exclude_reviewers or review.id in filters.exclude_ids:
+        return False
+    plain = RE_MARKUP.sub("", review.text)
+    if not filters.min_length <= len(plain) <= filters.max_length:
+        return False
+    if filters.require_rating and not review.rating:
+        return False
+    if filters.languages and _guess_language(plain) not in filters.languages:
+        return False
+    return True
+
+
+# Recorre las páginas de reseñas bajo demanda; solo se pide la siguiente página si hace falta
+def iter_reviews(
+    film_url: str,
+    sort: str = "activity",
+    filters: ReviewFilter | None = None,
+    max_pages: int = 10,
+) -> Iterator[Review]:
+    filters = filters or ReviewFilter()
+    first_page = f"{base_url()}/film/{film_slug(film_url)}/reviews/{REVIEW_SORTS[sort]}"
+    for page in range(1, max_pages + 1):
+        reviews_url = first_page if page == 1 else f"{first_page}page/{page}/"
+        sel = _get_selector(reviews_url, kind="reviews")
+        articles = XP_ARTICLES(sel.root)
+        for art in articles:
+            if filters.skip_spoilers and XP_SPOILER(art):
+                continue
+            review = _parse_review(art)
+            if _accepts(review, filters):
+                yield review
+        if not articles or not XP_NEXT_PAGE(sel.root):
+            return
+
+
 # Scrape reviews from the film URL
-def _scrape_reviews(film_url: str, max_reviews=10) -> list[Review]:
-    slug = film_url.rstrip("/").split("/")[-1]
-    reviews_url = f"https://letterboxd.com/film/{slug}/reviews/by/activity/"
-    sel = _get_selector(reviews_url)
-
-    articles = sel.xpath('//article[contains(@class,"production-viewing")]').getall()[:max_reviews] #/html/body/div[1]/div/div/section/div[3]
-    rvws: list[Review] = []
-
-    for art in articles:
-        art = Selector(text=art)
-        
-        reviewer = art.xpath(
-            '//a[contains(@class,"avatar")]/@href'
-        ).re_first(r"/([^/]+)/") or "anon" #/html/body/div[1]/div/div/section/div[3]/div[1]/article/a
-        reviewer_pic = art.xpath(
-            '//a[contains(@class,"avatar")]/img/@src'
-        ).get()
-        rating_text = art.xpath('//span[contains(@class,"rating")]/text()').get()
-        if rating_text:
-            rating = rating_text.count('★') + 0.5 * rating_text.count('½')
-        else:
-            rating = 0
-        date_iso = art.xpath('//time/@datetime').get()
-        date = datetime.fromisoformat(date_iso) if date_iso else None
-        likes_txt = art.xpath(
-            '//span[contains(@class,"like-link")]'
-        ).get() #/html/body/div[1]/div/div/section/div[3]/div[1]/article/div/div[2]/div[2]/div/p/span/a/span
-        likes = int(likes_txt.replace(",", "")) if likes_txt else None
-        review_div = art.xpath('//div[contains(@class,"js-review-body")]')
-        review_lines = []
-
-        B_TAG_OPEN  = re.compile(r"(?i)<\s*(b|strong)(\s+[^>]*)?>")   # <b ...>  or <strong ...>
-        B_TAG_CLOSE = re.compile(r"(?i)</\s*(b|strong)\s*>")          # </b>     or </strong>
-
-        for p in review_div.css("p"):
-            # 1) Reemplazar <br> por salto de línea real
-            cleaned_html = re.sub(r"(?i)<br\s*/?>", "\n", p.get())
-
-            # 2) Cambiar etiquetas de negrita por tokens [b] y [/b]
-            cleaned_html = B_TAG_OPEN.sub("[b]",  cleaned_html)
-            cleaned_html = B_TAG_CLOSE.sub("[/b]", cleaned_html)
-
-            # 3) Convertir a texto con las marcas preservadas
-            p_text = Selector(text=cleaned_html).xpath("string()").get()
-
-            # 4) Procesar cada línea resultante
-            for raw in p_text.splitlines():
-                clean = (html.unescape(raw)        # &nbsp; → ' '
-                        .replace("\xa0", " ")     # NBSP unicode → espacio normal
-                        .strip())
-                if clean:
-                    review_lines.append(clean)
-
-        rvws.append(
-            Review(
-                reviewer=reviewer,
-                reviewer_pic=reviewer_pic,
-                rating=rating,
-                date=date,
-                likes=likes,
-                text= "\n".join(review_lines) if review_lines else "",
-            )
-        )
-    return rvws
+def _scrape_reviews(
+    film_url: str,
+    max_reviews=10,
+    sort: str = "activity",
+    filters: ReviewFilter | None = None,
+) -> list[Review]:
+    return list(islice(iter_reviews(film_url, sort, filters), max_reviews))
 
 
 # Entry point to get a random movie with reviews
-def get_random_movie(film_url: str = None) -> Movie:
+# Si se pasa un executor, la página de la película y la de reseñas se piden en paralelo
+def get_random_movie(
+    film_url: str = None,
+    executor: Executor | None = None,
+    filters: ReviewFilter | None = None,
+) -> Movie:
     if not film_url:
         film_url = _random_film_choice()
-    movie_data = _scrape_movie(film_url)
-    movie_data["reviews"] = _scrape_reviews(film_url)
+    scrape_movie = timing.wrap("film", _scrape_movie)
+    scrape_reviews = timing.wrap("reviews", _scrape_reviews)
+    if executor is None:
+        movie_data = scrape_movie(film_url)
+        movie_data["reviews"] = scrape_reviews(film_url, filters=filters)
+    else:
+        movie_job = executor.submit(scrape_movie, film_url)
+        reviews_job = executor.submit(scrape_reviews, film_url, filters=filters)
+        movie_data = movie_job.result()
+        movie_data["reviews"] = reviews_job.result()
     return Movie(**movie_data)
 
 
@@ -0,0 +1,127 @@
+import json
+import statistics
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from bot.timing import Timings, activate
+
+RUNS_FILE = "runs.jsonl"
+
+# Ayuda de cada contador de Timings en el .prom (se exporta como letterbotxd_<contador>{kind=...})
+COUNTER_HELP = {
+    "fetch_bytes": "Bytes downloaded (or read from the HTTP cache) in the last run.",
+    "requests": "Fetches made in the last run, cached or not.",
+    "cache_hits": "Fetches served from the HTTP cache without a request.",
+    "cache_revalidated": "Fetches answered with 304 Not Modified.",
+    "upload_bytes": "Bytes of images handed to Facebook in the last run.",
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def prometheus(record: dict) -> str:
+    """Prometheus text exposition of one run, for node_exporter's textfile collector."""
+    command = record["command"]
+    lines = [
+        "# HELP letterbotxd_run_seconds Wall time of the last run.",
+        "# TYPE letterbotxd_run_seconds gauge",
+        f"letterbotxd_run_seconds{_labels(command=command)} {record['seconds']}",
+        "# HELP letterbotxd_run_success Whether the last run finished without an exception.",
+        "# TYPE letterbotxd_run_success gauge",
+        f"letterbotxd_run_success{_labels(command=command)} {int(record['ok'])}",
+        "# HELP letterbotxd_run_timestamp_seconds When the last run started.",
+        "# TYPE letterbotxd_run_timestamp_seconds gauge",
+        f"letterbotxd_run_timestamp_seconds{_labels(command=command)} {record['started_at']}",
+        "# HELP letterbotxd_stage_seconds Time spent in each pipeline stage in the last run.",
+        "# TYPE letterbotxd_stage_seconds gauge",
+    ]
+    lines += [
+        f"letterbotxd_stage_seconds{_labels(command=command, stage=stage)} {seconds}"
+        for stage, seconds in sorted(record["stages"].items())
+    ]
+    for metric, values in sorted(record["counters"].items()):
+        name = f"letterbotxd_{metric}"
+        lines.append(f"# HELP {name} {COUNTER_HELP.get(metric, metric)}")
+        lines.append(f"# TYPE {name} gauge")
+        lines += [f"{name}{_labels(command=command, kind=kind)} {value}" for kind, value in sorted(values.items())]
+    return "\n".join(lines) + "\n"
+
+
+def export(record: dict, metrics_dir: str | Path) -> None:
+    """Append the run to runs.jsonl and rewrite its command's .prom file."""
+    root = Path(metrics_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / RUNS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    # El collector puede leer en cualquier momento: se escribe aparte y se renombra
+    path = root / f"letterbotxd_{record['command']}.prom"
+    tmp = path.with_suffix(".prom.tmp")
+    tmp.write_text(prometheus(record), encoding="utf-8")
+    tmp.replace(path)
+
+
+@contextmanager
+def run_metrics(command: str, metrics_dir: str | None):
+    """
+    Time one run of `command`: yields its Timings (also active for bot.timing.span
+    and count) and exports it when the run ends, failed or not.
+    """
+    timings = Timings()
+    ok = False
+    try:
+        with activate(timings):
+            yield timings
+        ok = True
+    finally:
+        if metrics_dir:
+            try:
+                export(timings.record(command, ok), metrics_dir)
+            except OSError as e:
+                print(f"Could not write metrics: {e}")
+
+
+def load_runs(metrics_dir: str | Path, last: int, command: str | None = None) -> list[dict]:
+    path = Path(metrics_dir) / RUNS_FILE
+    if not path.exists():
+        return []
+    runs = deque(maxlen=last)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # una línea a medias de un run que murió escribiendo
+            if command is None or record.get("command") == command:
+                runs.append(record)
+    return list(runs)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of `samples`, `q` in 0..1; shared with bench.py."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(runs: list[dict]) -> dict[str, dict]:
+    """p50/p95 per stage (and of the whole run) over `runs`; stages a run skipped don't count."""
+    samples: dict[str, list[float]] = {"total": [record["seconds"] for record in runs]}
+    for record in runs:
+        for stage, seconds in record["stages"].items():
+            samples.setdefault(stage, []).append(seconds)
+    return {
+        stage: {
+            "runs": len(values),
+            "p50": statistics.median(values),
+            "p95": percentile(values, 0.95),
+            "max": max(values),
+        }
+        for stage, values in samples.items()
+        if values
+    }
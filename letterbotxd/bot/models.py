@@ -2,6 +2,7 @@ from datetime import datetime
 from pydantic import BaseModel, Field, HttpUrl
 
 class Review(BaseModel):
+    id: str | None = None  # data-object-id de Letterboxd, p. ej. "viewing:123"
     reviewer: str
     reviewer_pic: HttpUrl | None = None
     rating: float | None = 0
@@ -9,6 +10,15 @@ class Review(BaseModel):
     likes: int | None = None
     text: str
 
+class ReviewFilter(BaseModel):
+    min_length: int = 20
+    max_length: int = 700  # lo que cabe legible en la caja de 448x336
+    require_rating: bool = False
+    languages: list[str] | None = None  # p. ej. ["en", "es"]
+    skip_spoilers: bool = True
+    exclude_reviewers: set[str] = set()  # reviewers en cooldown (ver bot/history.py)
+    exclude_ids: set[str] = set()  # reseñas ya publicadas
+
 class Movie(BaseModel):
     url: HttpUrl
     title: str
@@ -18,4 +28,21 @@ class Movie(BaseModel):
     duration: int | None = None  # in minutes
     image_url: HttpUrl | None = None
     reviews: list[Review]
-    picked_review: Review | None = None
\ No newline at end of file
+    picked_review: Review | None = None
+
+class OutboxEntry(BaseModel):
+    key: str  # idempotency key: una entrada por post
+    created_at: float
+    message: str
+    comment: str | None = None
+    state: str = "pending"  # pending -> posted (foto subida) -> done | failed
+    post_id: str | None = None
+    attempts: int = 0
+    next_attempt_at: float = 0
+    last_error: str | None = None
+    uncertain: bool = False  # la subida pudo llegar a Facebook sin que viéramos la respuesta
+
+class Candidate(BaseModel):
+    key: str
+    created_at: float
+    movie: Movie  # con picked_review ya elegida; el PNG va al lado en disco
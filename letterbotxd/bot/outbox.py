@@ -0,0 +1,225 @@
+import hashlib
+import random
+import time
+from pathlib import Path
+
+from bot.models import Movie, OutboxEntry
+
+# Códigos de la Graph API que indican límite de peticiones
+RATE_LIMIT_CODES = {4, 17, 32, 613}
+
+
+def post_key(movie: Movie) -> str:
+    """Idempotency key: the same film + review never gets two outbox entries."""
+    review = movie.picked_review
+    payload = f"{movie.url}|{review.reviewer}|{review.date.isoformat()}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class RateLimited(Exception):
+    pass
+
+
+class Outbox:
+    """
+    Rendered posts waiting to be published, one directory per entry
+    (entry.json + post.png). An entry survives failures and restarts until it is
+    sent; the photo's post_id is saved as soon as Facebook returns it, so a
+    retry only redoes the steps that are missing. Finished entries move to
+    done/ and failed/, so listing the outbox only reads the live ones.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_attempts: int = 8,
+        backoff: float = 60.0,
+        max_backoff: float = 3600.0,
+        rate_limit_backoff: float = 900.0,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limit_backoff = rate_limit_backoff
+        self.done_dir = self.root / "done"
+        self.failed_dir = self.root / "failed"
+        # Hasta cuándo no se envía nada tras un rate limit (vale también para lo que llegue después)
+        self.pause_path = self.root / "paused_until"
+
+    @classmethod
+    def from_settings(cls, settings) -> "Outbox":
+        return cls(
+            settings.outbox_dir,
+            max_attempts=settings.outbox_max_attempts,
+            backoff=settings.outbox_backoff,
+            max_backoff=settings.outbox_max_backoff,
+            rate_limit_backoff=settings.outbox_rate_limit_backoff,
+        )
+
+    # Storage
+    def _dir(self, key: str) -> Path:
+        return self.root / key
+
+    def _save(self, entry: OutboxEntry) -> None:
+        path = self._dir(entry.key) / "entry.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(entry.model_dump_json(indent=4))
+        tmp.replace(path)
+
+    def _archive(self, entry: OutboxEntry) -> None:
+        # Lo terminado sale del directorio activo; get() lo sigue encontrando (idempotencia)
+        directory = self._dir(entry.key)
+        if entry.state == "done":
+            self.done_dir.mkdir(exist_ok=True)
+            (directory / "entry.json").replace(self.done_dir / f"{entry.key}.json")
+            (directory / "post.png").unlink(missing_ok=True)
+            directory.rmdir()
+        else:
+            # la imagen se queda por si hay que reenviarlo a mano
+            self.failed_dir.mkdir(exist_ok=True)
+            directory.replace(self.failed_dir / entry.key)
+
+    def get(self, key: str) -> OutboxEntry | None:
+        for path in (self._dir(key) / "entry.json", self.done_dir / f"{key}.json", self.failed_dir / key / "entry.json"):
+            if path.exists():
+                return OutboxEntry.model_validate_json(path.read_text())
+        return None
+
+    def entries(self) -> list[OutboxEntry]:
+        """Live entries (pending or posted), oldest first."""
+        entries = []
+        for path in self.root.glob("*/entry.json"):
+            entry = OutboxEntry.model_validate_json(path.read_text())
+            if entry.state in ("done", "failed"):
+                self._archive(entry)  # de antes de que existiera el archivo
+            else:
+                entries.append(entry)
+        return sorted(entries, key=lambda entry: entry.created_at)
+
+    def pending(self) -> list[OutboxEntry]:
+        return self.entries()
+
+    def paused_until(self) -> float:
+        try:
+            return float(self.pause_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return 0.0
+
+    def add(self, key: str, image: bytes, message: str, comment: str | None = None) -> OutboxEntry:
+        existing = self.get(key)
+        if existing is not None:
+            return existing
+
+        directory = self._dir(key)
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / "post.png.tmp"
+        tmp.write_bytes(image)
+        tmp.replace(directory / "post.png")
+        entry = OutboxEntry(key=key, created_at=time.time(), message=message, comment=comment)
+        self._save(entry)
+        return entry
+
+    # Sending
+    def _delay(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.backoff * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _send(self, entry: OutboxEntry, fb_api) -> None:
+        # aquí y no arriba: `outbox` sin --send no necesita el SDK de Facebook
+        from facebook import GraphAPIError
+
+        if entry.post_id is None:
+            if entry.uncertain:
+                # El intento anterior murió sin respuesta: puede que la foto ya esté publicada
+                # (con margen por si el reloj de Facebook va por detrás del nuestro)
+                entry.post_id = fb_api.find_post(entry.message, since=entry.created_at - 300)
+            if entry.post_id is None:
+                entry.uncertain = True
+                self._save(entry)
+                image = (self._dir(entry.key) / "post.png").read_bytes()
+                try:
+                    entry.post_id = fb_api.post(entry.message, image)
+                except GraphAPIError:
+                    # Facebook respondió con un error: seguro que no se publicó
+                    entry.uncertain = False
+                    raise
+            entry.uncertain = False
+            entry.state = "posted"
+            self._save(entry)
+
+        if entry.comment:
+            fb_api.comment_post(entry.post_id, entry.comment)
+        entry.state = "done"
+
+    def send(self, entry: OutboxEntry, fb_api) -> bool:
+        """One attempt at `entry`; raises RateLimited when Facebook asks us to slow down."""
+        from facebook import GraphAPIError
+
+        entry.attempts += 1
+        try:
+            self._send(entry, fb_api)
+        except Exception as e:
+            entry.last_error = f"{type(e).__name__}: {e}"
+            rate_limited = isinstance(e, GraphAPIError) and e.code in RATE_LIMIT_CODES
+            if rate_limited:
+                # no cuenta como intento: no es culpa de la entrada
+                entry.attempts -= 1
+                entry.next_attempt_at = time.time() + self.rate_limit_backoff
+            elif entry.attempts >= self.max_attempts:
+                entry.state = "failed"
+            else:
+                entry.next_attempt_at = time.time() + self._delay(entry.attempts)
+            self._save(entry)
+            if entry.state == "failed":
+                self._archive(entry)
+            if rate_limited:
+                raise RateLimited(entry.last_error) from e
+            return False
+
+        entry.last_error = None
+        self._save(entry)
+        self._archive(entry)
+        return True
+
+    def drain(self, fb_api, limit: int | None = None) -> dict:
+        """Send every entry that is due, oldest first. Stops at the first rate limit."""
+        summary = {"sent": 0, "failed": 0, "rate_limited": False, "waiting": 0}
+        now = time.time()
+        pending = self.pending()
+        if now < self.paused_until():
+            summary["rate_limited"] = True
+            summary["waiting"] = len(pending)
+            return summary
+
+        due = [entry for entry in pending if entry.next_attempt_at <= now]
+        for entry in due[:limit]:
+            try:
+                if self.send(entry, fb_api):
+                    summary["sent"] += 1
+                    print(f"Outbox: sent {entry.key} (post {entry.post_id})")
+                else:
+                    summary["failed"] += 1
+                    print(f"Outbox: {entry.key} attempt {entry.attempts} failed: {entry.last_error}")
+            except RateLimited as e:
+                summary["rate_limited"] = True
+                print(f"Outbox: rate limited, pausing {self.rate_limit_backoff:g}s: {e}")
+                # todo lo pendiente espera lo mismo, incluido lo que se añada durante la pausa
+                self.pause_path.write_text(str(time.time() + self.rate_limit_backoff))
+                break
+        summary["waiting"] = sum(entry.state in ("pending", "posted") for entry in pending)
+        return summary
+
+    def stats(self) -> dict:
+        counts: dict[str, int] = {}
+        for entry in self.entries():
+            counts[entry.state] = counts.get(entry.state, 0) + 1
+        # Lo archivado se cuenta sin leerlo
+        done = sum(1 for _ in self.done_dir.glob("*.json")) if self.done_dir.exists() else 0
+        failed = sum(1 for _ in self.failed_dir.glob("*/entry.json")) if self.failed_dir.exists() else 0
+        if done:
+            counts["done"] = done
+        if failed:
+            counts["failed"] = failed
+        return counts
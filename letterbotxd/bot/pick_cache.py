@@ -0,0 +1,49 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS picks (
+    key TEXT PRIMARY KEY,
+    slug TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def pick_key(slug: str, texts: list[str], prompt_version: int) -> str:
+    # Si cambian las reseñas o el prompt, la elección anterior ya no vale
+    payload = json.dumps([slug, texts, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PickCache:
+    """Review picks already made by the LLM: chosen index (0-based) and censored text."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.executescript(SCHEMA)
+
+    def get(self, key: str) -> tuple[int, str] | None:
+        with self._lock:
+            row = self._db.execute("SELECT idx, text FROM picks WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, slug: str, index: int, text: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO picks (key, slug, idx, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, slug, index, text, time.time()),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM picks").fetchone()[0]
@@ -1,17 +1,31 @@
-from PIL import (Image, ImageDraw, ImageFont, ImageFilter)
+from PIL import (Image, ImageDraw)
+import json
+import os
 import textwrap
-import random
-from pilmoji import Pilmoji
-
-from bot.models import Movie, Review
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError, as_completed
+from io import BytesIO
+from pathlib import Path
+from typing import Container, NamedTuple
+
+from bot import ranker
+from bot.history import PostHistory
+from bot.models import Movie, Review, ReviewFilter
 from bot.config import Settings
-from bot.gemini import GeminiWrapper
-from bot.fb import FaceAPI
+from bot.render.background import cached_background
+from bot.render.fonts import get_font
+from bot.render.icons import get_icon
+from bot.render.poster import fit_poster
 from bot.render.rounder import circle_image, round_image
+from bot.render.shadow import paste_with_shadow
 from bot.render.text_fit import best_fit
 from bot.render.markup import draw_markup_text
-from bot.letterboxd import get_random_movie
-from bot.utils import download_letterboxd_poster, download_image
+from bot.letterboxd import _random_film_choice, film_slug, get_random_movie, poster_endpoint
+from bot import timing
+from bot.metrics import run_metrics
+from bot.timing import Timings
+from bot.utils import ImageSource, fetch_image, fetch_poster, open_image
+from bot.workspace import Workspace
 
 color_title = (255, 255, 255)
 color_primary = (153, 170, 187)
@@ -51,140 +65,457 @@ def draw_grid(img: Image.Image, grid_size: int = 16):
     for y in range(0, height, grid_size):
         draw.line([(0, y), (width, y)], fill=(255, 0, 0, 64), width=1)
 
-def render(movie: Movie):
+def render(
+    movie: Movie,
+    poster: ImageSource,
+    profile_pic: ImageSource,
+    output_path: str | None = None,
+    fast_blur: bool = True,
+    background_cache_dir: str | None = "temp/cache/backgrounds",
+    timings: Timings | None = None,
+) -> Image.Image:
+    """
+    Render the post image. `poster` and `profile_pic` can be paths, encoded bytes
+    or decoded images; the result is returned and only saved if `output_path` is given.
+    """
+    timings = timings or Timings()
+    layout = dict(design)
     w, h = 1024, 720
     padding = 32
     img = Image.new('RGBA', (w, h), (20, 24, 28))
     img_overlay = Image.new('RGBA', (w, h), (0, 0, 0, 0))
 
-    img_poster = Image.open("temp/poster.png").convert("RGBA")
+    with timings.span("poster_load"):
+        img_poster = open_image(poster).convert("RGBA")
 
-    img_poster_blurred = img_poster.resize((w - padding, h - padding), Image.LANCZOS)
-    img_poster_blurred = img_poster_blurred.filter(ImageFilter.GaussianBlur(radius=200))
-    img_poster_blurred.putalpha(64)
-    img_poster_blurred = round_image(img_poster_blurred, radius=16)
-    img.alpha_composite(img_poster_blurred, (int(padding / 2), int(padding / 2)))
+    with timings.span("background"):
+        img_poster_blurred = cached_background(
+            film_slug(str(movie.url)), img_poster, (w - padding, h - padding),
+            background_cache_dir, radius=200, fast=fast_blur,
+        )
+        img.alpha_composite(img_poster_blurred, (int(padding / 2), int(padding / 2)))
 
-    img_poster.thumbnail((w - padding, h - padding), Image.LANCZOS)
-    if img_poster.size[0] > 459:
-        img_poster = img_poster.crop((0, 0, 459, img_poster.size[1]))
-    img_poster = round_image(img_poster, radius=(16, 0, 0, 16))
-    img.paste(img_poster, (int(padding / 2), int(padding / 2)), img_poster)
+    with timings.span("poster_round"):
+        # Un póster de fetch_poster ya viene escalado: aquí solo se recorta
+        img_poster = fit_poster(img_poster, (w - padding, h - padding))
+        img_poster = round_image(img_poster, radius=(16, 0, 0, 16))
+        img.paste(img_poster, (int(padding / 2), int(padding / 2)), img_poster)
 
     draw = ImageDraw.Draw(img_overlay)
 
-    font_title = ImageFont.truetype(font_title_path, 32)
-    font_body = ImageFont.truetype(font_body_path, 24)
-    font_body_bold = ImageFont.truetype(font_body_bold_path, 24)
-    font_review = ImageFont.truetype(font_body_path, 20)
+    font_title = get_font(font_title_path, 32)
+    font_body = get_font(font_body_path, 24)
+    font_body_bold = get_font(font_body_bold_path, 24)
+    font_review = get_font(font_body_path, 20)
 
     title = f"{movie.title} ({movie.year})"
     title = textwrap.fill(title, width=30)
     vertical_padding = 64 if "\n" in title else 0
 
-    draw.text((design["titleX"], design["titleY"]), title, font=font_title, fill=(color_title))
+    draw.text((layout["titleX"], layout["titleY"]), title, font=font_title, fill=(color_title))
 
-    design["directorY"] = design["directorY"] + vertical_padding
+    layout["directorY"] = layout["directorY"] + vertical_padding
     directed = "Directed by"
-    draw.text((design["directorX"], design["directorY"]), directed, font=font_body, fill=(color_primary))
-    draw.text((design["directorX"], design["directorY"] + 32), movie.director, font=font_body_bold, fill=(color_title))
+    draw.text((layout["directorX"], layout["directorY"]), directed, font=font_body, fill=(color_primary))
+    draw.text((layout["directorX"], layout["directorY"] + 32), movie.director, font=font_body_bold, fill=(color_title))
 
     if movie.duration:
         duration = f"{movie.duration:>6} min"
-        draw.text((design["directorX"] + 365, design["directorY"]), duration, font=font_body, fill=(color_primary))
+        draw.text((layout["directorX"] + 365, layout["directorY"]), duration, font=font_body, fill=(color_primary))
 
-    design["profilePicY"] = design["profilePicY"] + vertical_padding
-    img_profile_pic = Image.open("temp/profile_pic.png").convert("RGBA")
+    layout["profilePicY"] = layout["profilePicY"] + vertical_padding
+    img_profile_pic = open_image(profile_pic).convert("RGBA")
     img_profile_pic = circle_image(img_profile_pic, size=48)
-    img.paste(img_profile_pic, (design["profilePicX"], design["profilePicY"]), img_profile_pic)
+    img.paste(img_profile_pic, (layout["profilePicX"], layout["profilePicY"]), img_profile_pic)
 
     watched_by = "Watched by"
-    draw.text((design["profilePicX"] + 64, design["profilePicY"] + 6), watched_by, font=font_body, fill=(color_primary))
-    draw.text((design["profilePicX"] + 186, design["profilePicY"] + 6), movie.picked_review.reviewer, font=font_body_bold, fill=(color_title))
+    draw.text((layout["profilePicX"] + 64, layout["profilePicY"] + 6), watched_by, font=font_body, fill=(color_primary))
+    draw.text((layout["profilePicX"] + 186, layout["profilePicY"] + 6), movie.picked_review.reviewer, font=font_body_bold, fill=(color_title))
 
     # Draw a rectagle over the review area for debugging
-    #draw.rectangle((design["reviewX"], design["reviewY"], design["reviewX"] + design["reviewWidth"], design["reviewY"] + design["reviewHeight"]), outline=(255, 0, 0, 64), width=1)
+    #draw.rectangle((layout["reviewX"], layout["reviewY"], layout["reviewX"] + layout["reviewWidth"], layout["reviewY"] + layout["reviewHeight"]), outline=(255, 0, 0, 64), width=1)
 
     review_text = f'"{movie.picked_review.text}"'
-    font_review, lines = best_fit(review_text, (design["reviewWidth"], design["reviewHeight"]), font_body_path)
-    font_review_bold = ImageFont.truetype(font_body_bold_path, font_review.size)
+    with timings.span("text_fit"):
+        font_review, lines = best_fit(review_text, (layout["reviewWidth"], layout["reviewHeight"]), font_body_path)
+        font_review_bold = get_font(font_body_bold_path, font_review.size)
 
     line_height = font_review.getbbox("Ay")[3] - font_review.getbbox("Ay")[1]
-    design["reviewY"] = design["reviewY"] + vertical_padding
-    for line in lines:
-        #with Pilmoji(img_overlay) as pilmoji:
-        #    pilmoji.text((design["reviewX"], design["reviewY"]), line, color_secondary, font_review)
-        draw_markup_text(draw, (design["reviewX"], design["reviewY"]), line, font_review,font_review_bold, color_secondary)
-        design["reviewY"] += int(line_height * 1.1)
+    layout["reviewY"] = layout["reviewY"] + vertical_padding
+    with timings.span("markup"):
+        for line in lines:
+            #from pilmoji import Pilmoji
+            #with Pilmoji(img_overlay) as pilmoji:
+            #    pilmoji.text((layout["reviewX"], layout["reviewY"]), line, color_secondary, font_review)
+            draw_markup_text(draw, (layout["reviewX"], layout["reviewY"]), line, font_review,font_review_bold, color_secondary)
+            layout["reviewY"] += int(line_height * 1.1)
 
     date_str = f"{movie.picked_review.date.day} {movie.picked_review.date.strftime('%b')} {movie.picked_review.date.year}"
-    draw.text((design["dateX"], design["dateY"]), date_str, font=font_body, fill=color_primary)
+    draw.text((layout["dateX"], layout["dateY"]), date_str, font=font_body, fill=color_primary)
 
     # Draw stars
-    star_full = Image.open(icon_star_full_path).convert("RGBA").resize((32, 32), Image.LANCZOS)
-    star_half = Image.open(icon_star_half_path).convert("RGBA").resize((32, 32), Image.LANCZOS)
     star_size = 32
+    star_full = get_icon(icon_star_full_path, star_size)
+    star_half = get_icon(icon_star_half_path, star_size)
     for i in range(5):
         if i < int(movie.picked_review.rating):
-            img.paste(star_full, (design["starsX"] + i * star_size, design["starsY"]), star_full)
+            img.paste(star_full, (layout["starsX"] + i * star_size, layout["starsY"]), star_full)
         elif i < movie.picked_review.rating:
-            img.paste(star_half, (design["starsX"] + i * star_size, design["starsY"]), star_half)
+            img.paste(star_half, (layout["starsX"] + i * star_size, layout["starsY"]), star_half)
 
     # Draw grid for debugging
     #draw_grid(img)
 
-    alpha = img_overlay.getchannel('A')
-    shadow_opacity = 120 
-    alpha_shadow = alpha.point(lambda p: shadow_opacity if p > 200 else 0)
+    with timings.span("shadow"):
+        paste_with_shadow(img, img_overlay, offset=(1, 1), blur=1)
+    if output_path:
+        with timings.span("encode"):
+            img.save(output_path)
+    return img
 
-    img_shadow = Image.new('RGBA', img_overlay.size, (0, 0, 0, 0))  # fondo transparente
-    img_shadow.putalpha(alpha_shadow)
+def encode_png(img: Image.Image) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
 
-    img_shadow = img_shadow.filter(ImageFilter.GaussianBlur(radius=1))
-
-    img.paste(img_shadow, (1, 1), img_shadow)     # 1 px de desplazamiento, por ejemplo
-    img.paste(img_overlay, (0, 0), img_overlay)
-    img.save("temp/post.png")
-
-def post():
+def render_item(item: dict) -> str:
     """
-    Post to Letterbotxd Facebook page.
+    Render one batch item: a serialized Movie (with picked_review) plus the local
+    `poster_path`, `profile_pic_path` and `output_path`.
     """
-
-    settings = Settings()
-    gemini = GeminiWrapper(settings.gemini_api_key)
-    fb_api = FaceAPI(settings.page_access_token)
-
-    # Load movie data from json
-    with open("temp/movie.json", "r") as f:
-        movie_data = f.read()
-        movie = Movie.parse_raw(movie_data)
-
-    
-    movie = get_random_movie()
-    movie.picked_review = movie.reviews[1] 
-    try:
-        movie.picked_review = gemini.pick_best_review(movie)
-    except Exception as e:
-        print(f"Error picking best review: {e}")
-        movie.picked_review = random.choice(movie.reviews)
-    download_letterboxd_poster(movie.image_url, "temp/poster.png")
-    download_image(movie.picked_review.reviewer_pic, "temp/profile_pic.png")
-
-    render(movie)
-
+    item = dict(item)
+    poster_path = item.pop("poster_path")
+    profile_pic_path = item.pop("profile_pic_path")
+    output_path = item.pop("output_path")
+    movie = Movie.model_validate(item)
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    render(movie, poster_path, profile_pic_path, output_path)
+    return output_path
+
+def render_batch(jsonl_path: str, out_dir: str, workers: int | None = None) -> dict:
+    """
+    Render every movie in a JSONL file across a process pool.
+    Items without `output_path` are written to `out_dir/<line>-<slug>.png`.
+    """
+    items = []
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            slug = film_slug(item["url"])
+            item.setdefault("output_path", str(Path(out_dir) / f"{i:03d}-{slug}.png"))
+            items.append(item)
+
+    start = time.perf_counter()
+    rendered, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = {pool.submit(render_item, item): item for item in items}
+        for job in as_completed(jobs):
+            try:
+                rendered.append(job.result())
+            except Exception as e:
+                print(f"Error rendering {jobs[job]['url']}: {e}")
+                failed.append(jobs[job]["url"])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rendered": len(rendered),
+        "failed": len(failed),
+        "workers": workers or os.cpu_count(),
+        "seconds": round(elapsed, 3),
+        "posts_per_second": round(len(rendered) / elapsed, 2) if elapsed else 0,
+        "outputs": sorted(rendered),
+    }
+
+def fetch_movie(
+    timings: Timings,
+    executor: Executor | None = None,
+    exclude_slugs: Container[str] = frozenset(),
+    filters: ReviewFilter | None = None,
+    poster_cache_dir: str | None = None,
+) -> tuple[Movie, Future | None]:
+    """
+    Scrape a random movie that isn't in `exclude_slugs`. With an executor, the
+    poster download starts as soon as the slug is known and runs alongside the
+    film and reviews pages.
+    """
+    with timings.span("listing"):
+        film_url = _random_film_choice(exclude_slugs)
+    if executor is None:
+        with timings.span("scrape"):
+            return get_random_movie(film_url, filters=filters), None
+
+    slug = film_slug(film_url)
+    poster_job = executor.submit(timings.wrap("poster", fetch_poster), slug, poster_endpoint(slug), poster_cache_dir)
+    with timings.span("scrape"):
+        movie = get_random_movie(film_url, executor=executor, filters=filters)
+    return movie, poster_job
+
+def pick_reviews(movies: list[Movie], gemini, margin: float, timeout: float) -> list[Review]:
+    """
+    Local ranker first; the movies it isn't sure about go to Gemini in a single
+    request, never for longer than `timeout` (the ranker's pick is the fallback).
+    """
+    picks: list[Review | None] = [None] * len(movies)
+    unsure = []
+    for i, movie in enumerate(movies):
+        index, confidence = ranker.rank(movie.reviews)
+        if confidence >= margin:
+            print(f"Ranker picked review {index + 1} for {movie.title} (margin {confidence:.2f})")
+            picks[i] = ranker.pick(movie.reviews)
+        else:
+            unsure.append(i)
+
+    if unsure:
+        # Gemini trabaja sobre copias: si llega tarde no toca las reseñas que ya usamos
+        pool = ThreadPoolExecutor(max_workers=1)
+        job = pool.submit(gemini.pick_best_reviews, [movies[i].model_copy(deep=True) for i in unsure])
+        pool.shutdown(wait=False)
+        try:
+            with timing.span("gemini"):
+                reviews = job.result(timeout=timeout)
+            for i, review in zip(unsure, reviews):
+                picks[i] = review
+        except TimeoutError:
+            print(f"Gemini took over {timeout:g}s, using the ranker's pick")
+        except Exception as e:
+            print(f"Error picking best review: {e}")
+
+    return [pick if pick is not None else ranker.pick(movie.reviews) for pick, movie in zip(picks, movies)]
+
+
+class Prepared(NamedTuple):
+    movie: Movie
+    poster: bytes
+    profile_pic: bytes
+    png: bytes
+
+
+def validate_post(movie: Movie, png: bytes) -> None:
+    if not movie.picked_review or not movie.picked_review.text.strip():
+        raise ValueError(f"{movie.title}: empty review")
+    with Image.open(BytesIO(png)) as img:
+        img.verify()
+
+
+def prepare_posts(
+    count: int,
+    settings: Settings,
+    gemini,
+    exclude_slugs: set[str],
+    filters: ReviewFilter,
+    timings: Timings | None = None,
+) -> list[Prepared]:
+    """
+    Scrape `count` different movies, pick their reviews (one Gemini request for
+    all the unsure ones) and render them. Movies left without usable reviews
+    are skipped, so fewer than `count` may come back.
+    """
+    timings = timings or Timings()
+    exclude_slugs = set(exclude_slugs)
+    prepared = []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        executor = pool if settings.concurrent_fetch else None
+        fetched = []
+        for _ in range(count):
+            movie, poster_job = fetch_movie(timings, executor, exclude_slugs, filters, settings.poster_cache_dir or None)
+            exclude_slugs.add(film_slug(str(movie.url)))
+            if not movie.reviews:
+                print(f"No usable reviews for {movie.title}, skipping")
+                continue
+            fetched.append((movie, poster_job))
+
+        with timings.span("pick"):
+            picks = pick_reviews([movie for movie, _ in fetched], gemini, settings.ranker_margin, settings.gemini_timeout)
+
+        reviewers = set()
+        for (movie, poster_job), review in zip(fetched, picks):
+            if review.reviewer in reviewers:
+                print(f"{review.reviewer} already picked for another movie, skipping {movie.title}")
+                continue
+            reviewers.add(review.reviewer)
+            movie.picked_review = review
+            with timings.span("avatar"):
+                profile_pic = fetch_image(str(review.reviewer_pic))
+            if poster_job is not None:
+                poster = poster_job.result()
+            else:
+                with timings.span("poster"):
+                    poster = fetch_poster(film_slug(str(movie.url)), str(movie.image_url), settings.poster_cache_dir or None)
+
+            img = render(
+                movie, poster, profile_pic,
+                fast_blur=settings.fast_blur,
+                background_cache_dir=settings.background_cache_dir or None,
+                timings=timings,
+            )
+            with timings.span("encode"):
+                png = encode_png(img)
+            validate_post(movie, png)
+            prepared.append(Prepared(movie, poster, profile_pic, png))
+    return prepared
+
+
+def _history_filters(settings: Settings, history: PostHistory, buffer=None) -> tuple[set[str], ReviewFilter]:
+    # Lo ya publicado (y lo que ya espera en el buffer) se descarta antes de scrapear nada
+    slugs = history.recent_slugs(settings.film_cooldown_days)
+    reviewers = history.recent_reviewers(settings.reviewer_cooldown_days)
+    ids = history.review_ids()
+    if buffer is not None:
+        slugs |= buffer.slugs()
+        reviewers |= buffer.reviewers()
+        ids |= buffer.review_ids()
+    return slugs, ReviewFilter(exclude_reviewers=reviewers, exclude_ids=ids)
+
+
+def _gemini(settings: Settings):
+    # google-genai es lo más pesado de importar; solo se carga al necesitarlo
+    from bot.gemini import GeminiWrapper
+    from bot.pick_cache import PickCache
+
+    pick_cache = PickCache(settings.pick_cache_path) if settings.pick_cache_path else None
+    return GeminiWrapper(settings.gemini_api_key, cache=pick_cache, timeout=settings.gemini_timeout)
+
+
+def _facebook(settings: Settings):
+    from bot.fb import FaceAPI
+
+    return FaceAPI(settings.page_access_token, graph_url=settings.graph_url, timeout=settings.graph_timeout)
+
+
+def _send(outbox, history: PostHistory, fb_api, key: str, movie: Movie, png: bytes):
     post_msg = f"{movie.title} ({movie.year}) \n" \
                f"Directed by {movie.director}\n\n" \
                f"Watched by {movie.picked_review.reviewer} on {movie.picked_review.date.strftime('%d %b %Y')}\n" \
                f"Rating: {movie.picked_review.rating} stars"
     print(f"Posting review for {movie.title} by {movie.picked_review.reviewer} to Facebook")
 
-    # Post to Facebook
-    post_id = fb_api.post(post_msg, "temp/post.png")
+    # El post queda en disco antes de tocar Facebook: si falla, el siguiente run solo lo reenvía
+    # (la foto y, como comentario, el enlace a la película)
+    outbox.add(key, png, post_msg, f"Check out the movie here\n{movie.url}")
+    history.record(movie)
+    timing.count("upload_bytes", "photo", len(png))
+    with timing.span("facebook"):
+        outbox.drain(fb_api)
+
+
+def _drain_due(outbox, fb_api) -> None:
+    # Primero lo que quedó sin publicar y ya toca; lo que está en backoff o en pausa
+    # no bloquea el run: el post nuevo queda en el outbox detrás de ello
+    summary = outbox.drain(fb_api)
+    if summary["sent"] or summary["failed"] or summary["waiting"]:
+        print(f"Outbox: {json.dumps(summary)}")
 
-    # Comment on the post with the movie link
-    fb_api.comment_post(post_id, f"Check out the movie here\n{movie.url}")
 
-    # Save movie data to JSON
-    with open("temp/movie.json", "w") as f:
-        f.write(movie.model_dump_json(indent=4))
\ No newline at end of file
+def post(workspace: bool = False):
+    """
+    Post to Letterbotxd Facebook page.
+    Images stay in memory; with `workspace` the run's files are also kept under temp/runs/.
+    """
+    settings = Settings()
+    with run_metrics("post", settings.metrics_dir) as timings:
+        _post(settings, timings, workspace)
+
+
+def _image_ext(data: bytes) -> str:
+    # los avatares llegan en JPEG, PNG o WebP según lo que subió cada usuario; solo lee la cabecera
+    with Image.open(BytesIO(data)) as img:
+        return "jpg" if img.format == "JPEG" else (img.format or "bin").lower()
+
+
+def _post(settings: Settings, timings: Timings, workspace: bool = False):
+    from bot.outbox import Outbox, post_key
+
+    fb_api = _facebook(settings)
+    outbox = Outbox.from_settings(settings)
+    _drain_due(outbox, fb_api)
+
+    history = PostHistory(settings.history_path)
+    recent_slugs, filters = _history_filters(settings, history)
+
+    prepared = prepare_posts(1, settings, _gemini(settings), recent_slugs, filters, timings)
+    print(f"Fetch timings:\n{timings.report()}")
+    if not prepared:
+        raise RuntimeError("No movie with usable reviews")
+    movie, poster, profile_pic, post_png = prepared[0]
+
+    if workspace:
+        run = Workspace(settings.workspace_root)
+        run.save("poster.png", poster)
+        run.save(f"profile_pic.{_image_ext(profile_pic)}", profile_pic)
+        run.save("post.png", post_png)
+        run.save("movie.json", movie.model_dump_json(indent=4))
+        print(f"Run files kept in {run.path}")
+
+    _send(outbox, history, fb_api, post_key(movie), movie, post_png)
+
+
+def prefetch(daemon: bool = False, interval: float = 300):
+    """
+    Fill the prefetch buffer up to its depth with ready-to-publish posts. With
+    `daemon`, keep it topped up, checking every `interval` seconds.
+    """
+    from bot.outbox import post_key
+    from bot.prefetch import PrefetchBuffer
+
+    settings = Settings()
+    buffer = PrefetchBuffer.from_settings(settings)
+    history = PostHistory(settings.history_path)
+    gemini = _gemini(settings)
+    while True:
+        dropped = buffer.prune()
+        if dropped:
+            print(f"Dropped {dropped} stale candidates")
+        missing = buffer.missing()
+        if missing:
+            try:
+                with run_metrics("prefetch", settings.metrics_dir) as timings:
+                    recent_slugs, filters = _history_filters(settings, history, buffer)
+                    for prepared in prepare_posts(missing, settings, gemini, recent_slugs, filters, timings):
+                        buffer.add(post_key(prepared.movie), prepared.movie, prepared.png)
+                        print(f"Prefetched {prepared.movie.title} ({prepared.movie.picked_review.reviewer})")
+            except Exception as e:
+                if not daemon:
+                    raise
+                print(f"Prefetch failed: {e}")
+        print(f"Prefetch buffer: {len(buffer)}/{buffer.depth}")
+        if not daemon:
+            return
+        time.sleep(interval)
+
+
+def publish(fallback: bool = True):
+    """
+    Publish the oldest prefetched post; the scheduled run is then about one
+    Graph API call. With an empty buffer, `fallback` runs the whole pipeline.
+    """
+    settings = Settings()
+    with run_metrics("publish", settings.metrics_dir) as timings:
+        _publish(settings, timings, fallback)
+
+
+def _publish(settings: Settings, timings: Timings, fallback: bool = True):
+    from bot.outbox import Outbox
+    from bot.prefetch import PrefetchBuffer
+
+    fb_api = _facebook(settings)
+    outbox = Outbox.from_settings(settings)
+    _drain_due(outbox, fb_api)
+
+    history = PostHistory(settings.history_path)
+    buffer = PrefetchBuffer.from_settings(settings)
+    item = buffer.pop(
+        history.recent_slugs(settings.film_cooldown_days),
+        history.recent_reviewers(settings.reviewer_cooldown_days),
+        history.review_ids(),
+    )
+    if item is None:
+        if not fallback:
+            print("Prefetch buffer empty, nothing to publish")
+            return
+        print("Prefetch buffer empty, preparing a post now")
+        return _post(settings, timings)
+
+    candidate, png = item
+    _send(outbox, history, fb_api, candidate.key, candidate.movie, png)
@@ -0,0 +1,115 @@
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from bot.letterboxd import film_slug
+from bot.models import Candidate, Movie
+
+
+class PrefetchBuffer:
+    """
+    Posts prepared ahead of time (scraped, picked, rendered, validated), one
+    directory per candidate with candidate.json + post.png. At most `depth`
+    candidates; older than `max_age` seconds they are dropped.
+    """
+
+    def __init__(self, root: str | Path, depth: int = 3, max_age: float = 12 * 60 * 60):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.depth = depth
+        self.max_age = max_age
+
+    @classmethod
+    def from_settings(cls, settings) -> "PrefetchBuffer":
+        return cls(settings.prefetch_dir, settings.prefetch_depth, settings.prefetch_max_age_hours * 60 * 60)
+
+    def _load(self, directory: Path) -> Candidate | None:
+        try:
+            return Candidate.model_validate_json((directory / "candidate.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def candidates(self) -> list[tuple[Path, Candidate]]:
+        found = []
+        for directory in self.root.iterdir():
+            if directory.name.startswith(".") or not directory.is_dir():
+                continue
+            candidate = self._load(directory)
+            if candidate is not None:
+                found.append((directory, candidate))
+        return sorted(found, key=lambda item: item[1].created_at)
+
+    def __len__(self) -> int:
+        return len(self.candidates())
+
+    def missing(self) -> int:
+        return max(0, self.depth - len(self))
+
+    def add(self, key: str, movie: Movie, png: bytes) -> Candidate:
+        candidate = Candidate(key=key, created_at=time.time(), movie=movie)
+        # Se escribe en un directorio oculto y se renombra: nunca se ve un candidato a medias
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir()
+        (tmp / "post.png").write_bytes(png)
+        (tmp / "candidate.json").write_text(candidate.model_dump_json(indent=4))
+        target = self.root / key
+        if target.exists():
+            shutil.rmtree(tmp)
+            return candidate
+        os.replace(tmp, target)
+        return candidate
+
+    def prune(self) -> int:
+        """Drop stale candidates and leftovers of interrupted writes."""
+        dropped = 0
+        now = time.time()
+        for directory in self.root.iterdir():
+            if directory.name.startswith(".") and now - directory.stat().st_mtime > 60 * 60:
+                shutil.rmtree(directory, ignore_errors=True)
+        for directory, candidate in self.candidates():
+            if now - candidate.created_at > self.max_age:
+                shutil.rmtree(directory, ignore_errors=True)
+                dropped += 1
+        return dropped
+
+    def pop(
+        self,
+        exclude_slugs: set[str] = frozenset(),
+        exclude_reviewers: set[str] = frozenset(),
+        exclude_ids: set[str] = frozenset(),
+    ) -> tuple[Candidate, bytes] | None:
+        """
+        Oldest fresh candidate that doesn't clash with what has been posted
+        since it was prepared; the ones that clash are dropped.
+        """
+        self.prune()
+        for directory, candidate in self.candidates():
+            # Renombrar reclama el candidato: dos publish a la vez no se llevan el mismo
+            claimed = self.root / f".claimed-{directory.name}"
+            try:
+                os.replace(directory, claimed)
+            except OSError:
+                continue
+            movie = candidate.movie
+            review = movie.picked_review
+            clashes = (
+                film_slug(str(movie.url)) in exclude_slugs
+                or review.reviewer in exclude_reviewers
+                or review.id in exclude_ids
+            )
+            png = None if clashes else (claimed / "post.png").read_bytes()
+            shutil.rmtree(claimed, ignore_errors=True)
+            if png is not None:
+                return candidate, png
+        return None
+
+    def slugs(self) -> set[str]:
+        return {film_slug(str(candidate.movie.url)) for _, candidate in self.candidates()}
+
+    def reviewers(self) -> set[str]:
+        return {candidate.movie.picked_review.reviewer for _, candidate in self.candidates()}
+
+    def review_ids(self) -> set[str]:
+        return {candidate.movie.picked_review.id for _, candidate in self.candidates() if candidate.movie.picked_review.id}
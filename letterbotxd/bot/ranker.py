@@ -0,0 +1,95 @@
+import math
+import re
+
+from bot.models import Review, ReviewFilter
+
+# Por encima de esto best_fit baja tanto la fuente que cuesta leerla en la caja de 448x336
+LEGIBLE_CHARS = 450
+MAX_CHARS = ReviewFilter().max_length
+# Las muy cortas suelen ser solo un chiste de una línea
+MIN_CHARS = 40
+
+BAD_WORDS = (
+    "fuck", "fucking", "fucked", "shit", "bitch", "cunt", "dick", "cock", "pussy",
+    "porn", "sex", "cocaine", "heroin", "weed", "meth", "whore", "slut", "bastard",
+)
+RE_BAD = re.compile(r"\b(" + "|".join(BAD_WORDS) + r")\b", re.I)
+RE_BOLD = re.compile(r"\[b\](.*?)\[/b\]", re.S)
+RE_MARKUP = re.compile(r"\[/?b\]")
+
+# Ajustados con `bench ranker` sobre las páginas guardadas: los likes mandan, el largo desempata
+WEIGHTS = {
+    "likes": 1.5,
+    "rating": 0.3,
+    "length": 1.0,
+    "markup": 0.2,
+    "bad_words": -0.5,
+}
+
+
+def censor(text: str) -> str:
+    """Cambia una letra de cada palabrota por *, como se le pide a Gemini."""
+    return RE_BAD.sub(lambda m: m.group(0)[0] + "*" + m.group(0)[2:], text)
+
+
+def _length_score(n: int) -> float:
+    # Meseta entre MIN_CHARS y LEGIBLE_CHARS, cae hasta 0 en MAX_CHARS
+    if n <= MIN_CHARS:
+        return n / MIN_CHARS
+    if n <= LEGIBLE_CHARS:
+        return 1.0
+    return max(0.0, 1.0 - (n - LEGIBLE_CHARS) / (MAX_CHARS - LEGIBLE_CHARS))
+
+
+def _markup_score(text: str, plain: str) -> float:
+    # un poco de negrita ayuda; una reseña entera en negrita no
+    bold = sum(len(span) for span in RE_BOLD.findall(text))
+    return 1.0 if 0 < bold <= 0.3 * max(1, len(plain)) else 0.0
+
+
+def _bad_word_count(text: str) -> int:
+    # La búsqueda de subcadenas es mucho más rápida que la regex y casi todas las reseñas están limpias
+    lowered = text.lower()
+    if not any(word in lowered for word in BAD_WORDS):
+        return 0
+    return len(RE_BAD.findall(text))
+
+
+def features(reviews: list[Review]) -> dict[str, list[float]]:
+    """One column per feature, each in roughly 0..1, so scoring is a weighted sum per row."""
+    plain = [RE_MARKUP.sub("", review.text) for review in reviews]
+    likes = [math.log1p(review.likes or 0) for review in reviews]
+    top_likes = max(likes, default=0.0) or 1.0
+    return {
+        "likes": [value / top_likes for value in likes],
+        "rating": [1.0 if review.rating else 0.0 for review in reviews],
+        "length": [_length_score(len(text)) for text in plain],
+        "markup": [_markup_score(review.text, text) for review, text in zip(reviews, plain)],
+        "bad_words": [min(1.0, _bad_word_count(text) / 3) for text in plain],
+    }
+
+
+def score_reviews(reviews: list[Review], weights: dict[str, float] = WEIGHTS) -> list[float]:
+    columns = features(reviews)
+    return [
+        sum(weights[name] * columns[name][i] for name in weights)
+        for i in range(len(reviews))
+    ]
+
+
+def rank(reviews: list[Review]) -> tuple[int, float]:
+    """Index of the best review and its margin over the runner-up (inf if there is only one)."""
+    if not reviews:
+        raise ValueError("No reviews to rank.")
+    scores = score_reviews(reviews)
+    order = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+    margin = scores[order[0]] - scores[order[1]] if len(order) > 1 else math.inf
+    return order[0], margin
+
+
+def pick(reviews: list[Review]) -> Review:
+    """Best review by local score, with the text censored."""
+    index, _ = rank(reviews)
+    review = reviews[index]
+    review.text = censor(review.text)
+    return review
@@ -0,0 +1,89 @@
+import threading
+import time
+
+
+class HostLimiter:
+    """
+    Throttle for one host: a token bucket (`rate` requests/s, bursts of
+    `burst`) plus a concurrency limit that adapts AIMD-style. Every success
+    under `target_latency` adds 1/limit; an error, a 429/5xx or a slow response
+    halves it, at most once per `decrease_every` seconds. A Retry-After pauses
+    every request to the host until it expires.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: int = 10,
+        max_concurrency: int = 6,
+        min_concurrency: int = 1,
+        target_latency: float = 2.0,
+        decrease_every: float = 1.0,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency = target_latency
+        self.decrease_every = decrease_every
+
+        self.tokens = float(burst)
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._refilled_at = time.monotonic()
+        self._decreased_at = 0.0
+        self._cond = threading.Condition()
+        self.counters = {"requests": 0, "waited": 0, "decreases": 0, "pauses": 0}
+        self.wait_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self) -> None:
+        waited = False
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.in_flight >= int(self.limit):
+                    wait = None  # hasta que termine otra petición
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    self.counters["requests"] += 1
+                    self.counters["waited"] += waited
+                    self.wait_seconds += now - start
+                    return
+                waited = True
+                self._cond.wait(wait)
+
+    def release(self, latency: float, ok: bool, retry_after: float | None = None) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+                self.counters["pauses"] += 1
+            if ok and latency <= self.target_latency:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            elif now - self._decreased_at >= self.decrease_every:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self._decreased_at = now
+                self.counters["decreases"] += 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                **self.counters,
+                "wait_s": round(self.wait_seconds, 2),
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+            }
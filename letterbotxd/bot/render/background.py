@@ -0,0 +1,89 @@
+import os
+import time
+from contextlib import suppress
+from io import BytesIO
+from pathlib import Path
+from typing import Tuple
+
+from PIL import Image, ImageFilter
+
+from bot.fsutil import prune_dir, write_atomic
+from bot.render.poster import MAX_CACHE_AGE
+from bot.render.rounder import round_image
+
+# Unos 35 KB por fondo: caben en torno a 2000 películas
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def blur_poster(
+    img: Image.Image,
+    size: Tuple[int, int],
+    radius: float = 200,
+    fast: bool = True,
+    factor: int = 8,
+) -> Image.Image:
+    """
+    Stretch the poster to `size` and blur it. In fast mode the blur runs at
+    1/`factor` of the resolution and the result is scaled back up; with a radius
+    this large the difference is not visible.
+    """
+    if not fast:
+        return img.resize(size, Image.LANCZOS).filter(ImageFilter.GaussianBlur(radius=radius))
+
+    w, h = size
+    small = img.resize((max(1, w // factor), max(1, h // factor)), Image.BOX)
+    small = small.filter(ImageFilter.GaussianBlur(radius=radius / factor))
+    return small.resize(size, Image.BICUBIC)
+
+
+def render_background(
+    img: Image.Image,
+    size: Tuple[int, int],
+    radius: float = 200,
+    fast: bool = True,
+    alpha: int = 64,
+    corner_radius: int = 16,
+) -> Image.Image:
+    background = blur_poster(img, size, radius=radius, fast=fast)
+    background.putalpha(alpha)
+    return round_image(background, radius=corner_radius)
+
+
+def cached_background(
+    slug: str,
+    img: Image.Image,
+    size: Tuple[int, int],
+    cache_dir: str | Path | None,
+    radius: float = 200,
+    fast: bool = True,
+    max_age: float = MAX_CACHE_AGE,
+    max_bytes: int = MAX_CACHE_BYTES,
+) -> Image.Image:
+    """
+    Finished (blurred, alpha, rounded) background, cached on disk per film slug
+    for `max_age` seconds, like the poster it comes from; the most recently used
+    ones are kept up to `max_bytes`.
+    """
+    if cache_dir is None:
+        return render_background(img, size, radius=radius, fast=fast)
+
+    mode = "fast" if fast else "exact"
+    path = Path(cache_dir) / f"{slug}-{size[0]}x{size[1]}-r{radius:g}-{mode}.png"
+    try:
+        # mtime = cuándo se generó; atime = último uso (para prune_dir)
+        made_at = path.stat().st_mtime
+        if time.time() - made_at < max_age:
+            with Image.open(path) as cached:
+                background = cached.convert("RGBA")
+            with suppress(FileNotFoundError):
+                os.utime(path, (time.time(), made_at))
+            return background
+    except FileNotFoundError:
+        pass
+
+    background = render_background(img, size, radius=radius, fast=fast)
+    buf = BytesIO()
+    background.save(buf, format="PNG")
+    write_atomic(path, buf.getvalue())
+    prune_dir(path.parent, max_bytes, "*.png")
+    return background
@@ -0,0 +1,17 @@
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from PIL import ImageFont
+
+
+# El fichero de la fuente se lee una sola vez por proceso
+@lru_cache(maxsize=None)
+def font_bytes(path: str) -> bytes:
+    return Path(path).read_bytes()
+
+
+# Caras de FreeType ya inicializadas, por (ruta, tamaño)
+@lru_cache(maxsize=128)
+def get_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(BytesIO(font_bytes(path)), size)
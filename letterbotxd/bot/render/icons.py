@@ -0,0 +1,10 @@
+from functools import lru_cache
+
+from PIL import Image
+
+
+# Iconos ya convertidos y redimensionados, cargados una vez por proceso
+@lru_cache(maxsize=32)
+def get_icon(path: str, size: int) -> Image.Image:
+    with Image.open(path) as icon:
+        return icon.convert("RGBA").resize((size, size), Image.LANCZOS)
@@ -0,0 +1,84 @@
+import math
+import os
+import time
+from contextlib import suppress
+from io import BytesIO
+from pathlib import Path
+from typing import Tuple
+
+from PIL import Image
+
+from bot.fsutil import prune_dir, write_atomic
+
+# Hueco del póster en render(): (w - padding, h - padding), recortado a este ancho
+POSTER_BOX = (992, 688)
+POSTER_WIDTH = 459
+POSTER_SIZE = (POSTER_WIDTH, POSTER_BOX[1])
+
+# Como el TTL de las imágenes en la caché HTTP: un póster cambiado en Letterboxd se recoge en un mes
+MAX_CACHE_AGE = 30 * 24 * 60 * 60
+# Unos 130 KB por póster: caben en torno a 500 películas
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def fit_poster(img: Image.Image, box: Tuple[int, int] = POSTER_BOX, width: int = POSTER_WIDTH) -> Image.Image:
+    """Scale the poster to fit `box` and crop it to `width`, as render() lays it out."""
+    img.thumbnail(box, Image.LANCZOS)
+    if img.size[0] > width:
+        img = img.crop((0, 0, width, img.size[1]))
+    return img
+
+
+def draft_poster(img: Image.Image, box: Tuple[int, int] = POSTER_BOX) -> None:
+    """
+    Before loading a JPEG, pick the smallest DCT scale (1/2, 1/4, 1/8) that
+    still covers `box`: the full-size image is never decoded. Does nothing for
+    other formats.
+    """
+    scale = min(box[0] / img.width, box[1] / img.height)
+    img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+
+
+def normalize_poster(data: bytes) -> Image.Image:
+    """
+    Poster scaled to fit POSTER_BOX but not cropped: render() builds the
+    background from the whole poster and crops the copy it pastes.
+    """
+    with Image.open(BytesIO(data)) as img:
+        draft_poster(img)
+        img.thumbnail(POSTER_BOX, Image.LANCZOS)
+        return img.convert("RGB")
+
+
+def cached_poster(
+    slug: str,
+    fetch_data,
+    cache_dir: str | Path | None,
+    max_age: float = MAX_CACHE_AGE,
+    max_bytes: int = MAX_CACHE_BYTES,
+) -> bytes:
+    """
+    Normalized poster (PNG within POSTER_BOX) for `slug`, cached on disk for
+    `max_age` seconds; the most recently used ones are kept up to `max_bytes`.
+    `fetch_data()` returns the downloaded image and is only called on a miss.
+    """
+    path = Path(cache_dir) / f"{slug}-{POSTER_BOX[0]}x{POSTER_BOX[1]}.png" if cache_dir else None
+    if path is not None:
+        try:
+            # mtime = cuándo se descargó; atime = último uso (para prune_dir)
+            fetched_at = path.stat().st_mtime
+            if time.time() - fetched_at < max_age:
+                png = path.read_bytes()
+                with suppress(FileNotFoundError):
+                    os.utime(path, (time.time(), fetched_at))
+                return png
+        except FileNotFoundError:
+            pass
+
+    buf = BytesIO()
+    normalize_poster(fetch_data()).save(buf, format="PNG", compress_level=1)
+    png = buf.getvalue()
+    if path is not None:
+        write_atomic(path, png)
+        prune_dir(path.parent, max_bytes, "*.png")
+    return png
@@ -1,29 +1,19 @@
+from functools import lru_cache
 from typing import Sequence, Union, Tuple
 from PIL import Image, ImageDraw, ImageFilter
 
 
-def round_image(
-    img: Image.Image,
-    radius: Union[int, Sequence[int]],
+@lru_cache(maxsize=32)
+def rounded_mask(
+    size: Tuple[int, int],
+    radii: Tuple[int, int, int, int],
     oversample: int = 4,
     blur: float = 0.5,
 ) -> Image.Image:
-    if isinstance(radius, int):
-        r_tl = r_tr = r_br = r_bl = radius
-    elif len(radius) == 4:
-        r_tl, r_tr, r_br, r_bl = radius
-    else:
-        raise ValueError(
-            "radius debe ser un int o una secuencia de 4 enteros"
-        )
-
-    w, h = img.size
-    max_r = min(w, h) // 2 
-    r_tl, r_tr, r_br, r_bl = [
-        max(0, min(int(r), max_r)) for r in (r_tl, r_tr, r_br, r_bl)
-    ]
-
-    n = max(1, int(oversample))
+    # Solo depende del tamaño y los radios: se genera una vez y se reutiliza
+    n = oversample
+    w, h = size
+    r_tl, r_tr, r_br, r_bl = radii
     w2, h2 = w * n, h * n
     r_tl2, r_tr2, r_br2, r_bl2 = [r * n for r in (r_tl, r_tr, r_br, r_bl)]
 
@@ -49,12 +39,44 @@ def round_image(
     mask = mask.resize((w, h), Image.LANCZOS)
     if blur > 0:
         mask = mask.filter(ImageFilter.GaussianBlur(blur))
+    return mask
+
+
+def round_image(
+    img: Image.Image,
+    radius: Union[int, Sequence[int]],
+    oversample: int = 4,
+    blur: float = 0.5,
+) -> Image.Image:
+    if isinstance(radius, int):
+        r_tl = r_tr = r_br = r_bl = radius
+    elif len(radius) == 4:
+        r_tl, r_tr, r_br, r_bl = radius
+    else:
+        raise ValueError(
+            "radius debe ser un int o una secuencia de 4 enteros"
+        )
+
+    w, h = img.size
+    max_r = min(w, h) // 2 
+    r_tl, r_tr, r_br, r_bl = [
+        max(0, min(int(r), max_r)) for r in (r_tl, r_tr, r_br, r_bl)
+    ]
+
+    mask = rounded_mask((w, h), (r_tl, r_tr, r_br, r_bl), max(1, int(oversample)), blur)
 
     img_rgba = img.convert("RGBA")
     out = Image.new("RGBA", (w, h))
     out.paste(img_rgba, (0, 0), mask=mask)
     return out
 
+@lru_cache(maxsize=16)
+def circle_mask(size: int) -> Image.Image:
+    mask = Image.new('L', (size, size), 0)
+    draw = ImageDraw.Draw(mask)
+    draw.ellipse((0, 0, size-1, size-1), fill=255)
+    return mask
+
 def circle_image(img: Image.Image, size: int | None = None) -> Image.Image:
     
     img = img.copy()
@@ -76,9 +98,7 @@ def circle_image(img: Image.Image, size: int | None = None) -> Image.Image:
     if img.size != (size, size):
         img = img.resize((size, size), Image.LANCZOS)
     
-    mask = Image.new('L', (size, size), 0)
-    draw = ImageDraw.Draw(mask)
-    draw.ellipse((0, 0, size-1, size-1), fill=255)
+    mask = circle_mask(size)
     
     result = Image.new('RGBA', (size, size))
     result.paste(img, (0, 0), mask)
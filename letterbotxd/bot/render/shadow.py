@@ -0,0 +1,40 @@
+import math
+from typing import Tuple
+
+from PIL import Image, ImageFilter
+
+SHADOW_OPACITY = 120
+SHADOW_THRESHOLD = 200
+# alpha > 200 → sombra, en una tabla de 256 entradas en lugar de un lambda
+SHADOW_LUT = [SHADOW_OPACITY if p > SHADOW_THRESHOLD else 0 for p in range(256)]
+
+
+def paste_with_shadow(
+    img: Image.Image,
+    overlay: Image.Image,
+    offset: Tuple[int, int] = (1, 1),
+    blur: float = 1,
+) -> None:
+    """
+    Paste `overlay` on `img` with a blurred drop shadow. Only the bounding box of
+    the overlay (plus the reach of the blur) is processed.
+    """
+    alpha = overlay.getchannel("A")
+    bbox = alpha.getbbox()
+    if bbox is None:
+        return
+
+    # Margen para que el desenfoque vea la misma vecindad (ceros) que en el lienzo completo
+    margin = 4 * math.ceil(blur) + 1
+    w, h = overlay.size
+    x0, y0 = max(0, bbox[0] - margin), max(0, bbox[1] - margin)
+    x1, y1 = min(w, bbox[2] + margin), min(h, bbox[3] + margin)
+    box = (x0, y0, x1, y1)
+
+    shadow = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+    shadow.putalpha(alpha.crop(box).point(SHADOW_LUT))
+    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=blur))
+
+    region = overlay.crop(box)
+    img.paste(shadow, (x0 + offset[0], y0 + offset[1]), shadow)
+    img.paste(region, (x0, y0), region)
@@ -1,55 +1,141 @@
 from PIL import Image, ImageDraw, ImageFont
+import math
 import textwrap
 
+from bot.render.fonts import get_font
+
+
+class WordWidths:
+    """Memo de anchos por palabra para una fuente; el espacio se mide una sola vez."""
+
+    def __init__(self, font: ImageFont.FreeTypeFont, draw: ImageDraw.ImageDraw):
+        self.font = font
+        self.draw = draw
+        self.space = draw.textlength(" ", font=font)
+        # Margen en el que la suma de anchos no se da por buena y se mide la línea entera
+        # (kerning entre palabras con layouts complejos)
+        self.tolerance = 0.05 * font.size + 1
+        self._cache: dict[str, float] = {}
+
+    def __call__(self, word: str) -> float:
+        width = self._cache.get(word)
+        if width is None:
+            width = self._cache[word] = self.draw.textlength(word, font=self.font)
+        return width
+
+    def line(self, words: list[str]) -> float:
+        return self.draw.textlength(" ".join(words), font=self.font)
+
+
 def wrap_text_pixels(
     text: str,
     font: ImageFont.FreeTypeFont,
     max_width: int,
-    draw: ImageDraw.ImageDraw
+    draw: ImageDraw.ImageDraw,
+    widths: WordWidths | None = None,
 ) -> list[str]:
+    widths = widths or WordWidths(font, draw)
     lines = []
     for paragraph in text.split("\n"):
         if paragraph.strip() == "":
             lines.append("")
             continue
 
-        buf = []
+        buf: list[str] = []
+        buf_px = 0.0
         for word in paragraph.split():
-            buf.append(word)
-            test_line = " ".join(buf)
-            if draw.textlength(test_line, font=font) > max_width and len(buf) > 1:
-                buf.pop()
+            if not buf:
+                buf, buf_px = [word], widths(word)
+                continue
+            test_px = buf_px + widths.space + widths(word)
+            if abs(test_px - max_width) <= widths.tolerance:
+                test_px = widths.line(buf + [word])
+            if test_px > max_width:
                 lines.append(" ".join(buf))
-                buf = [word]
+                buf, buf_px = [word], widths(word)
+            else:
+                buf.append(word)
+                buf_px = test_px
         if buf:
             lines.append(" ".join(buf))
     return lines
 
-def best_fit(text, box, font_path, min_size=10, max_size=250, line_spacing=0.1):
+
+def _fits(text, box, font_path, size, line_spacing, draw):
     w_box, h_box = box
-    lo, hi, best = min_size, max_size, None
+    font = get_font(font_path, size)
+    widths = WordWidths(font, draw)
+    lines = wrap_text_pixels(text, font, w_box, draw, widths)
+
+    bbox = draw.textbbox((0, 0), "Ay", font=font)
+    line_height = bbox[3] - bbox[1]
+    total_h = int(line_height * (1 + line_spacing) * len(lines))
 
+    # Las líneas de varias palabras ya caben por construcción; solo una palabra suelta puede desbordar
+    ok = total_h <= h_box and all(" " in line or widths(line) <= w_box for line in lines)
+    return ok, font, lines
+
+
+def _estimate_size(text, box, font_path, line_spacing, draw, min_size, max_size) -> int:
+    # Tamaño en el que el área del texto (a 100 px escalada) iguala el área de la caja
+    ref = get_font(font_path, 100)
+    bbox = draw.textbbox((0, 0), "Ay", font=ref)
+    area_100 = draw.textlength(text.replace("\n", " "), font=ref) * (bbox[3] - bbox[1]) * (1 + line_spacing)
+    if area_100 <= 0:
+        return max_size
+    size = int(100 * math.sqrt(box[0] * box[1] / area_100))
+    return max(min_size, min(max_size, size))
+
+
+def best_fit(text, box, font_path, min_size=10, max_size=250, line_spacing=0.1):
     dummy_img = Image.new("RGB", (1, 1))
     draw = ImageDraw.Draw(dummy_img)
 
-    while lo <= hi:
-        mid = (lo + hi) // 2
-        font = ImageFont.truetype(font_path, mid)
-        lines = wrap_text_pixels(text, font, w_box, draw)
+    def fits(size):
+        return _fits(text, box, font_path, size, line_spacing, draw)
 
-        bbox = draw.textbbox((0, 0), "Ay", font=font)
-        line_height = bbox[3] - bbox[1]
-        total_h = int(line_height * (1 + line_spacing) * len(lines))
+    # Búsqueda exponencial desde la estimación y luego binaria en el intervalo encontrado
+    guess = _estimate_size(text, box, font_path, line_spacing, draw, min_size, max_size)
+    ok, font, lines = fits(guess)
+    best = (font, lines) if ok else None
+    step = 1
+    if ok:
+        lo, hi = guess + 1, max_size
+        while lo <= hi:
+            probe = min(guess + step, max_size)
+            ok, font, lines = fits(probe)
+            if not ok:
+                hi = probe - 1
+                break
+            best, lo = (font, lines), probe + 1
+            if probe == max_size:
+                break
+            step *= 2
+    else:
+        lo, hi = min_size, guess - 1
+        while lo <= hi:
+            probe = max(guess - step, min_size)
+            ok, font, lines = fits(probe)
+            if ok:
+                best, lo = (font, lines), probe + 1
+                break
+            hi = probe - 1
+            if probe == min_size:
+                break
+            step *= 2
 
-        if total_h <= h_box and all(draw.textlength(line, font=font) <= w_box for line in lines):
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        ok, font, lines = fits(mid)
+        if ok:
             best = (font, lines)
             lo = mid + 1
         else:
             hi = mid - 1
 
     if best is None:
-        best_font = ImageFont.truetype(font_path, min_size)
-        best_lines = wrap_text_pixels(text, best_font, w_box, draw)
+        best_font = get_font(font_path, min_size)
+        best_lines = wrap_text_pixels(text, best_font, box[0], draw)
         return best_font, best_lines
     return best
 
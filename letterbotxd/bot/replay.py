@@ -0,0 +1,160 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+
+TEXT_TYPES = ("text/", "application/json", "application/javascript")
+
+
+def replay_key(url: str) -> str:
+    # Las respuestas se indexan sin host: el servidor local sirve el sitio y el CDN a la vez
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class Recorder:
+    """
+    Guarda respuestas en un directorio de fixtures: manifest.json (ruta → metadatos)
+    y los cuerpos por sha256 en bodies/.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.bodies = self.root / "bodies"
+        self.bodies.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.root / "manifest.json"
+        self.manifest = json.loads(self.manifest_path.read_text()) if self.manifest_path.exists() else {}
+        self._lock = threading.Lock()
+
+    def record(self, url: str, response: httpx.Response) -> None:
+        self.add(url, response.content, response.headers.get("content-type", "application/octet-stream"), response.status_code)
+
+    def add(self, url: str, body: bytes, content_type: str, status: int = 200) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.bodies / digest
+        with self._lock:
+            if not path.exists():
+                path.write_bytes(body)
+            self.manifest[replay_key(url)] = {
+                "url": url,
+                "status": status,
+                "content_type": content_type,
+                "body": digest,
+            }
+            self.manifest_path.write_text(json.dumps(self.manifest, indent=1, sort_keys=True))
+
+
+class ReplayServer:
+    """
+    Servidor HTTP local que sirve un directorio grabado con latencia simulada.
+    Los hosts grabados (letterboxd.com, el CDN) se reescriben a la dirección del
+    servidor, así que basta con apuntar BASE a `server.url`. Con `max_rps`
+    responde 429 + Retry-After por encima de ese ritmo, como un servidor real.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        port: int = 0,
+        max_rps: float | None = None,
+    ):
+        self.root = Path(root)
+        self.manifest = json.loads((self.root / "manifest.json").read_text())
+        self.latency = latency
+        self.jitter = jitter
+        self.hosts = sorted({
+            f"{urlsplit(entry['url']).scheme}://{urlsplit(entry['url']).netloc}"
+            for entry in self.manifest.values()
+        })
+        self.max_rps = max_rps
+        self.requests = 0
+        self.throttled = 0
+        self._window_start = time.monotonic()
+        self._window_requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _body(self, entry: dict) -> bytes:
+        body = (self.root / "bodies" / entry["body"]).read_bytes()
+        if entry["content_type"].startswith(TEXT_TYPES):
+            text = body.decode("utf-8")
+            for host in self.hosts:
+                text = text.replace(host, self.url)
+            body = text.encode("utf-8")
+        return body
+
+    def _throttle(self) -> bool:
+        # Ventana fija de un segundo
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_requests = now, 0
+            self._window_requests += 1
+            if self.max_rps is not None and self._window_requests > self.max_rps:
+                self.throttled += 1
+                return True
+        return False
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                delay = server.latency + random.uniform(-server.jitter, server.jitter)
+                time.sleep(max(0.0, delay))
+                if server._throttle():
+                    self.send_response(429)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                entry = server.manifest.get(self.path)
+                if entry is None:
+                    self.send_error(404)
+                    return
+                body = server._body(entry)
+                self.send_response(entry["status"])
+                self.send_header("Content-Type", entry["content_type"])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,102 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Timings de la ejecución en curso (ver `activate`); None = no se mide nada
+_active: "Timings | None" = None
+
+
+class Timings:
+    """Registro de tramos (spans) de una ejecución, relativos a su inicio."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: dict[str, tuple[float, float]] = {}
+        # Un tramo puede repetirse (varias películas por run): aquí se suma
+        self.totals: dict[str, float] = {}
+        # métrica -> etiqueta -> valor (bytes descargados, aciertos de caché...)
+        self.counters: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.spans[name] = (start - self.t0, end - self.t0)
+                self.totals[name] = self.totals.get(name, 0.0) + end - start
+
+    def wrap(self, name: str, fn):
+        def inner(*args, **kwargs):
+            with self.span(name):
+                return fn(*args, **kwargs)
+        return inner
+
+    def count(self, metric: str, label: str, value: float = 1) -> None:
+        with self._lock:
+            counter = self.counters.setdefault(metric, {})
+            counter[label] = counter.get(label, 0) + value
+
+    def duration(self, name: str) -> float:
+        start, end = self.spans[name]
+        return end - start
+
+    def record(self, command: str, ok: bool) -> dict:
+        with self._lock:
+            return {
+                "command": command,
+                "started_at": round(self.started_at, 3),
+                "seconds": round(time.perf_counter() - self.t0, 4),
+                "ok": ok,
+                "stages": {name: round(total, 4) for name, total in self.totals.items()},
+                "counters": {metric: dict(values) for metric, values in self.counters.items()},
+            }
+
+    def report(self) -> str:
+        serial = sum(end - start for start, end in self.spans.values())
+        rows = [
+            f"  {name:<16} {start * 1000:8.0f} ms -> {end * 1000:8.0f} ms  ({(end - start) * 1000:.0f} ms)"
+            for name, (start, end) in sorted(self.spans.items(), key=lambda kv: kv[1][0])
+        ]
+        if self.spans:
+            # del primer tramo al último: lo de antes (imports, clientes de Gemini y Facebook) va aparte
+            first = min(start for start, _ in self.spans.values())
+            last = max(end for _, end in self.spans.values())
+            rows.append(f"  critical path {(last - first) * 1000:.0f} ms (sum of stages {serial * 1000:.0f} ms, "
+                        f"setup before the first stage {first * 1000:.0f} ms)")
+        return "\n".join(rows)
+
+
+@contextmanager
+def activate(timings: Timings):
+    """Make `timings` the target of `span` and `count` for modules that don't get it passed in."""
+    global _active
+    previous, _active = _active, timings
+    try:
+        yield timings
+    finally:
+        _active = previous
+
+
+def active() -> Timings | None:
+    return _active
+
+
+def span(name: str):
+    return _active.span(name) if _active is not None else nullcontext()
+
+
+def wrap(name: str, fn):
+    def inner(*args, **kwargs):
+        with span(name):
+            return fn(*args, **kwargs)
+    return inner
+
+
+def count(metric: str, label: str, value: float = 1) -> None:
+    if _active is not None:
+        _active.count(metric, label, value)
@@ -1,29 +1,37 @@
 from __future__ import annotations
 
-import os
+from io import BytesIO
 from pathlib import Path
 from typing import Union
 
-import requests
 from parsel import Selector
+from PIL import Image
 
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (compatible; Letterbotxd/0.1; +https://github.com/SebasXeon/Letterbotxd)"
-    ),
-    "X-Requested-With": "XMLHttpRequest", 
-}
+from bot.client import fetch
+from bot.render.poster import POSTER_SIZE, cached_poster
 
-def download_letterboxd_poster(
+ImageSource = Union[str, Path, bytes, Image.Image]
+
+
+def _src_covers(img, min_size: tuple[int, int]) -> bool:
+    # width/height del <img> son las medidas de `src` (la versión 1x)
+    try:
+        width, height = int(img.attrib["width"]), int(img.attrib["height"])
+    except (KeyError, ValueError):
+        return False
+    return width >= min_size[0] and height >= min_size[1]
+
+
+def poster_image_url(
     endpoint_url: str,
-    dest_path: Union[str, Path],
     *,
     hi_res: bool = True,
-    timeout: int = 15,
-) -> Path:
+    min_size: tuple[int, int] | None = None,
+    timeout: float | None = None,
+) -> str:
+    """With `min_size`, the 1x `src` is used whenever it is at least that big, even with `hi_res`."""
     # 1. Obtener el HTML del póster
-    r = requests.get(endpoint_url, headers=HEADERS, timeout=timeout)
-    r.raise_for_status()
+    r = fetch(endpoint_url, timeout=timeout, kind="poster")
     sel = Selector(text=r.text)
 
     # 2. Extraer la URL de la imagen
@@ -31,49 +39,81 @@ def download_letterboxd_poster(
     if not img:
         raise RuntimeError("No se encontró la etiqueta <img> en el HTML del póster.")
 
+    if min_size and _src_covers(img, min_size):
+        return img.attrib["src"]
     if hi_res and (srcset := img.attrib.get("srcset")):
         # toma el último elemento de srcset (normalmente la versión @2x)
-        image_url = srcset.split()[-2]  # formato: URL 2x
-    else:
-        image_url = img.attrib["src"]
+        return srcset.split()[-2]  # formato: URL 2x
+    return img.attrib["src"]
+
+
+def fetch_letterboxd_poster(
+    endpoint_url: str,
+    *,
+    hi_res: bool = True,
+    min_size: tuple[int, int] | None = None,
+    timeout: float | None = None,
+) -> bytes:
+    image_url = poster_image_url(endpoint_url, hi_res=hi_res, min_size=min_size, timeout=timeout)
+    return fetch(image_url, timeout=timeout, kind="image").content
+
+
+def fetch_poster(slug: str, endpoint_url: str, cache_dir: str | Path | None = None, timeout: float | None = None) -> bytes:
+    """
+    Poster ready for render(): downloaded at the smallest size that covers the
+    layout and decoded straight at that size, as PNG. Kept per slug in
+    `cache_dir` (see cached_poster), so a film seen recently costs no request
+    and no JPEG decode.
+    """
+    return cached_poster(
+        slug,
+        lambda: fetch_letterboxd_poster(endpoint_url, min_size=POSTER_SIZE, timeout=timeout),
+        cache_dir,
+    )
+
+
+def fetch_image(url: str, timeout: float | None = None, kind: str = "avatar") -> bytes:
+    return fetch(url, timeout=timeout, kind=kind).content
+
+
+def open_image(src: ImageSource) -> Image.Image:
+    """Abre una imagen desde una ruta, bytes o un Image ya decodificado."""
+    if isinstance(src, Image.Image):
+        return src
+    if isinstance(src, bytes):
+        return Image.open(BytesIO(src))
+    return Image.open(src)
 
-    # 3. Resolver destino
+
+def _resolve_dest(dest_path: Union[str, Path], url: str) -> Path:
     dest_path = Path(dest_path).expanduser().resolve()
     if dest_path.is_dir() or dest_path.suffix == "":
         # Guardar con el mismo nombre del fichero remoto
-        filename = Path(image_url).name.split("?")[0]  # quita params
+        filename = Path(url).name.split("?")[0]  # quita params
         dest_path = dest_path / filename
 
     dest_path.parent.mkdir(parents=True, exist_ok=True)
+    return dest_path
 
-    # 4. Descargar la imagen binaria
-    with requests.get(image_url, headers=HEADERS, timeout=timeout, stream=True) as resp:
-        resp.raise_for_status()
-        with open(dest_path, "wb") as fh:
-            for chunk in resp.iter_content(chunk_size=8192):
-                fh.write(chunk)
 
+def download_letterboxd_poster(
+    endpoint_url: str,
+    dest_path: Union[str, Path],
+    *,
+    hi_res: bool = True,
+    timeout: float | None = None,
+) -> Path:
+    image_url = poster_image_url(endpoint_url, hi_res=hi_res, timeout=timeout)
+    dest_path = _resolve_dest(dest_path, image_url)
+    dest_path.write_bytes(fetch(image_url, timeout=timeout, kind="image").content)
     return dest_path
 
 def download_image(
     url: str,
     dest_path: Union[str, Path],
-    timeout: int = 15,
+    timeout: float | None = None,
+    kind: str = "avatar",
 ) -> Path:
-    # 1. Resolver destino
-    dest_path = Path(dest_path).expanduser().resolve()
-    if dest_path.is_dir() or dest_path.suffix == "":
-        # Guardar con el mismo nombre del fichero remoto
-        filename = Path(url).name.split("?")[0]  # quita params
-        dest_path = dest_path / filename
-
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # 2. Descargar la imagen binaria
-    with requests.get(url, headers=HEADERS, timeout=timeout, stream=True) as resp:
-        resp.raise_for_status()
-        with open(dest_path, "wb") as fh:
-            for chunk in resp.iter_content(chunk_size=8192):
-                fh.write(chunk)
-
+    dest_path = _resolve_dest(dest_path, url)
+    dest_path.write_bytes(fetch_image(url, timeout=timeout, kind=kind))
     return dest_path
@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from PIL import Image
+
+
+class Workspace:
+    """
+    Per-run directory (temp/runs/<timestamp>-<id>/) for keeping the files of a
+    post. Only used when asked for; the pipeline itself works in memory.
+    """
+
+    def __init__(self, root: str | Path = "temp/runs", run_id: str | None = None):
+        self.run_id = run_id or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.path = Path(root) / self.run_id
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def save(self, name: str, data: bytes | str | Image.Image) -> Path:
+        dest = self.path / name
+        if isinstance(data, Image.Image):
+            data.save(dest)
+        elif isinstance(data, str):
+            dest.write_text(data, encoding="utf-8")
+        else:
+            dest.write_bytes(data)
+        return dest
@@ -8,7 +8,7 @@
 #from bot import versus as vs
 #from bot import tournament as tr
 #from bot import versus_video as vs_video
-from bot import post as lb_post
+import bench
 
 import typer
 import json
@@ -17,14 +17,156 @@ import json
 # setup
 # ---------------------------
 app = typer.Typer()
+app.add_typer(bench.app, name="bench")
 
 
 # ---------------------------
 # Commands
 # ---------------------------
 @app.command()
-def post():
-    lb_post.post()
+def post(workspace: bool = typer.Option(False, help="Keep this run's images and movie JSON under temp/runs/.")):
+    from bot import post as lb_post
+
+    lb_post.post(workspace=workspace)
+
+@app.command()
+def prefetch(
+    daemon: bool = typer.Option(False, help="Keep the buffer topped up instead of filling it once."),
+    interval: float = typer.Option(300, help="Seconds between checks with --daemon."),
+):
+    """Prepare posts ahead of time, up to PREFETCH_DEPTH."""
+    from bot import post as lb_post
+
+    lb_post.prefetch(daemon=daemon, interval=interval)
+
+@app.command()
+def publish(fallback: bool = typer.Option(True, help="Run the whole pipeline when the buffer is empty.")):
+    """Publish the oldest prefetched post."""
+    from bot import post as lb_post
+
+    lb_post.publish(fallback=fallback)
+
+@app.command()
+def render_batch(
+    jsonl: str = typer.Argument(..., help="JSONL of serialized movies with picked_review, poster_path and profile_pic_path."),
+    out_dir: str = typer.Option("temp/batch", help="Directory for items without an output_path."),
+    workers: int = typer.Option(None, help="Worker processes (default: one per CPU)."),
+):
+    from bot import post as lb_post
+
+    summary = lb_post.render_batch(jsonl, out_dir, workers)
+    outputs = summary.pop("outputs")
+    print("\n".join(outputs))
+    print(json.dumps(summary, indent=4))
+
+@app.command()
+def record(
+    out_dir: str = typer.Argument("data/fixtures/replay", help="Fixture directory to write."),
+    runs: int = typer.Option(3, help="Random movies to scrape and record."),
+):
+    """Scrape live Letterboxd and record every response for offline replay."""
+    from bot.client import start_recording, stop_recording
+    from bot.letterboxd import get_random_movie
+    from bot.render.poster import POSTER_SIZE
+    from bot.utils import fetch_image, fetch_letterboxd_poster
+
+    recorder = start_recording(out_dir)
+    try:
+        for _ in range(runs):
+            movie = get_random_movie()
+            print(f"Recorded {movie.title} ({movie.year})")
+            fetch_letterboxd_poster(str(movie.image_url), min_size=POSTER_SIZE)
+            for review in movie.reviews:
+                if review.reviewer_pic:
+                    fetch_image(str(review.reviewer_pic))
+    finally:
+        stop_recording()
+    print(f"{len(recorder.manifest)} responses in {out_dir}")
+
+@app.command()
+def replay(
+    fixtures: str = typer.Argument("data/fixtures/replay", help="Recorded fixture directory."),
+    port: int = typer.Option(8800, help="Port to listen on."),
+    latency: float = typer.Option(0.05, help="Simulated latency per request, in seconds."),
+):
+    """Serve recorded fixtures as a local Letterboxd stand-in (point LETTERBOXD_BASE at it)."""
+    from bot.replay import ReplayServer
+
+    server = ReplayServer(fixtures, latency=latency, port=port)
+    print(f"Serving {fixtures} on {server.url}  (LETTERBOXD_BASE={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+@app.command()
+def cache(clear: bool = typer.Option(False, help="Empty the HTTP cache after printing its stats.")):
+    # sin pasar por bot.client, que arrastra httpx y el limitador
+    from bot.cache import HttpCache
+    from bot.config import Settings
+
+    settings = Settings()
+    if not settings.cache_enabled:
+        print("HTTP cache disabled")
+        return
+    http_cache = HttpCache(settings.cache_dir, settings.cache_max_bytes)
+    print(json.dumps(http_cache.stats(), indent=4))
+    if clear:
+        http_cache.clear()
+
+@app.command()
+def stats(
+    last: int = typer.Option(50, help="Runs to aggregate, most recent first."),
+    command: str = typer.Option(None, help="Only runs of this command (post, publish, prefetch)."),
+):
+    """p50/p95 per pipeline stage over the last runs (METRICS_DIR/runs.jsonl)."""
+    from bot.config import Settings
+    from bot.metrics import load_runs, summarize
+
+    settings = Settings()
+    runs = load_runs(settings.metrics_dir, last, command)
+    if not runs:
+        print(f"No runs recorded in {settings.metrics_dir}")
+        return
+    failed = sum(not run["ok"] for run in runs)
+    print(f"{len(runs)} runs ({failed} failed)")
+    print(f"{'stage':<16} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage, row in sorted(summarize(runs).items(), key=lambda kv: kv[1]["p50"], reverse=True):
+        print(f"{stage:<16} {row['runs']:>5} {row['p50'] * 1000:9.0f} {row['p95'] * 1000:9.0f} {row['max'] * 1000:9.0f}")
+
+@app.command()
+def outbox(send: bool = typer.Option(False, help="Send whatever is due now.")):
+    """Posts rendered but not yet published to Facebook."""
+    from bot.config import Settings
+    from bot.outbox import Outbox
+
+    settings = Settings()
+    box = Outbox.from_settings(settings)
+    for entry in box.pending():
+        print(f"{entry.key}  {entry.state:<8} attempts {entry.attempts}  {entry.last_error or ''}")
+    print(json.dumps(box.stats(), indent=4))
+    if send:
+        from bot.fb import FaceAPI
+
+        fb_api = FaceAPI(settings.page_access_token, graph_url=settings.graph_url, timeout=settings.graph_timeout)
+        print(json.dumps(box.drain(fb_api), indent=4))
+
+@app.command()
+def fake_graph(
+    port: int = typer.Option(8900, help="Port to listen on."),
+    failure_rate: float = typer.Option(0.0, help="Share of requests answered with a server error."),
+    drop_rate: float = typer.Option(0.0, help="Share of photo uploads published without a response."),
+    rate_limit: int = typer.Option(None, help="Requests per second before answering with a rate-limit error."),
+):
+    """Serve a local fake Graph API (point GRAPH_URL at it)."""
+    from bot.fakes import FakeGraphServer
+
+    server = FakeGraphServer(failure_rate=failure_rate, drop_rate=drop_rate, rate_limit=rate_limit, port=port)
+    print(f"Fake Graph API on {server.url}  (GRAPH_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
 
 # ---------------------------
 # run
@@ -1,31 +1,171 @@
-import schedule
-import time 
 import datetime
+import heapq
 import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+from letterbotxd.worker import TaskRunner
+
+SCHEDULE_PATH = Path('./data/schedule.json')
+
+
+def next_fire(task: dict, after: datetime.datetime) -> datetime.datetime | None:
+    """Primer instante > `after` con día, hora y minuto válidos para la tarea."""
+    days = {d for d in task['days'] if 0 <= d <= 6}
+    hours = sorted(h for h in task['hours'] if 0 <= h <= 23)
+    if not days or not hours:
+        return None
+
+    base = after.replace(second=0, microsecond=0)
+    for offset in range(8):
+        day = base + datetime.timedelta(days=offset)
+        if day.weekday() not in days:
+            continue
+        for hour in hours:
+            fire = day.replace(hour=hour, minute=task['minute'])
+            if fire > after:
+                return fire
+    return None
 
 
 class Scheduler:
-    def __init__(self) -> None:
+    def __init__(self, path: str | Path = SCHEDULE_PATH) -> None:
+        self.path = Path(path)
+        self.heap: list[tuple[datetime.datetime, int, dict]] = []
+        self.running: set[str] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._seq = 0
+        self._mtime = None
+        # último instante revisado por _dispatch_due; una recarga recalcula desde aquí
+        self._checked = None
+        self.load()
+
+        # "worker": procesos persistentes con todo ya importado; "subprocess": un python por tarea
+        self.runners: queue.Queue[TaskRunner] = queue.Queue()
+        self._all_runners: list[TaskRunner] = []
+        if self.mode == 'worker':
+            for _ in range(self.workers):
+                runner = TaskRunner(timeout=self.timeout)
+                self._all_runners.append(runner)
+                self.runners.put(runner)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='task')
+
+    def load(self):
         # Load tasks from json file
-        with open('./data/schedule.json', 'r') as f:
+        with open(self.path, 'r') as f:
             data = json.load(f)
-            self.tasks = data['tasks']
+        self._mtime = self.path.stat().st_mtime
+        self.tasks = data['tasks']
+        # mode y workers solo se aplican al arrancar; el resto se recarga en caliente
+        self.mode = getattr(self, 'mode', None) or data.get('mode', 'worker')
+        self.workers = getattr(self, 'workers', None) or data.get('workers', 1)
+        self.timeout = data.get('timeout', 600)
+        # Qué hacer con una ejecución perdida (tarea lenta, equipo suspendido...):
+        # "catch_up" la lanza una vez al volver, "skip" la descarta
+        self.missed = data.get('missed', 'skip')
+        self.grace = data.get('grace', 60)
+        self.reload_interval = data.get('reload_interval', 30)
+        # desde la última revisión y no desde ahora, o se pierde lo que venció mientras dormía
+        self._build_heap(self._checked or datetime.datetime.now())
+
+    def _build_heap(self, now: datetime.datetime):
+        self.heap = []
+        for task in self.tasks:
+            self._push(task, now)
+
+    def _push(self, task: dict, after: datetime.datetime):
+        fire = next_fire(task, after)
+        if fire is not None:
+            self._seq += 1
+            heapq.heappush(self.heap, (fire, self._seq, task))
+
+    def _maybe_reload(self):
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            self.load()
+        except (json.JSONDecodeError, KeyError) as e:
+            # fichero a medio escribir o roto: seguimos con el horario anterior
+            print(f'Could not reload {self.path}: {e}')
+            self._mtime = mtime
+            return
+        # también los que están ocupados ahora: el valor nuevo vale desde su próxima tarea
+        for runner in self._all_runners:
+            runner.timeout = self.timeout
+        print(f'Reloaded {self.path} ({len(self.tasks)} tasks)')
 
     def start(self):
-        schedule.every().minute.do(self.run_tasks)
         #logger.info('Started scheduler')
         print('Started scheduler')
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
-    
-    def run_tasks(self):
+        for runner in list(self.runners.queue):
+            try:
+                runner.start()
+            except (EOFError, OSError, RuntimeError) as e:
+                # run() lo vuelve a arrancar con la siguiente tarea
+                print(f'Worker failed to start: {e}')
+        try:
+            while True:
+                self._dispatch_due()
+                self._sleep()
+                self._maybe_reload()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            while not self.runners.empty():
+                self.runners.get().close()
+
+    def _sleep(self):
+        # Duerme hasta el próximo disparo; el tope solo sirve para ver si cambió el fichero
+        timeout = self.reload_interval
+        if self.heap:
+            until = (self.heap[0][0] - datetime.datetime.now()).total_seconds()
+            timeout = max(0.0, min(timeout, until))
+        self._wake.wait(timeout)
+        self._wake.clear()
+
+    def _dispatch_due(self):
         now = datetime.datetime.now()
-        for task in self.tasks:
-            if now.weekday() in task['days'] and now.hour in task['hours']:
-                if now.minute == task['minute']:
-                    #logger.info(f'Running task {task["name"]}')
-                    os.system(f"python letterbotxd/letterbotxd.py {task['command']}")
+        self._checked = now
+        while self.heap and self.heap[0][0] <= now:
+            fire, _, task = heapq.heappop(self.heap)
+            # la siguiente se calcula desde ahora: varias perdidas cuentan como una
+            self._push(task, now)
+
+            late = (now - fire).total_seconds()
+            policy = task.get('missed', self.missed)
+            if late > self.grace and policy != 'catch_up':
+                print(f'Skipping missed run of {task["name"]} at {fire:%Y-%m-%d %H:%M} ({late:.0f}s late)')
+                continue
+            self.submit(task)
+
+    def submit(self, task: dict):
+        with self._lock:
+            if task['name'] in self.running:
+                print(f'Task {task["name"]} still running, skipping this run')
+                return
+            self.running.add(task['name'])
+        self.executor.submit(self.run_task, task)
 
+    def run_task(self, task):
+        #logger.info(f'Running task {task["name"]}')
+        try:
+            if self.mode != 'worker':
+                os.system(f"python letterbotxd/letterbotxd.py {task['command']}")
+                return
+            runner = self.runners.get()
+            try:
+                runner.run(task['command'], timeout=task.get('timeout'))
+            finally:
+                self.runners.put(runner)
+        except Exception as e:
+            print(f'Task {task["name"]} failed: {e}')
+        finally:
+            with self._lock:
+                self.running.discard(task['name'])
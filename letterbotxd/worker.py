@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ---------------------------
+# Import modules
+# ---------------------------
+import importlib.util
+import multiprocessing as mp
+import os
+import shlex
+import signal
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import click
+
+CLI_DIR = Path(__file__).resolve().parent
+CLI_PATH = CLI_DIR / "letterbotxd.py"
+
+
+# ---------------------------
+# Worker process
+# ---------------------------
+def _load_cli():
+    # letterbotxd.py importa `bot` y `bench` como módulos de primer nivel
+    if str(CLI_DIR) not in sys.path:
+        sys.path.insert(0, str(CLI_DIR))
+    spec = importlib.util.spec_from_file_location("letterbotxd_cli", CLI_PATH)
+    cli = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(cli)
+    return cli
+
+
+def _warm_up():
+    # Lo que cada `python letterbotxd.py ...` pagaba en cada tarea
+    from bot import fb, gemini, post
+    from bot.client import get_client
+    from bot.render.fonts import get_font
+
+    get_client()
+    for path in (post.font_title_path, post.font_body_path, post.font_body_bold_path):
+        get_font(path, 24)
+
+
+def _worker_main(conn):
+    start = time.perf_counter()
+    if hasattr(os, "setpgrp"):
+        # grupo propio: al matar el worker caen también sus hijos (p.ej. el pool de render-batch)
+        os.setpgrp()
+    cli = _load_cli()
+    _warm_up()
+    conn.send(("ready", time.perf_counter() - start))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            # el scheduler murió sin cerrar
+            break
+        if message is None:
+            break
+        task_id, argv = message
+        task_start = time.perf_counter()
+        try:
+            # con standalone_mode=False, typer.Exit(n) devuelve n en vez de salir
+            code = cli.app(args=argv, prog_name="letterbotxd", standalone_mode=False)
+        except SystemExit as e:
+            code = e.code
+        except click.ClickException as e:
+            e.show()
+            code = e.exit_code
+        except click.exceptions.Abort:
+            code = 1
+        except Exception:
+            conn.send((task_id, False, traceback.format_exc(), time.perf_counter() - task_start))
+            continue
+        ok = code in (None, 0)
+        conn.send((task_id, ok, None if ok else f"exit code {code}", time.perf_counter() - task_start))
+
+
+# ---------------------------
+# Runner (scheduler side)
+# ---------------------------
+class TaskRunner:
+    """
+    Long-lived worker process that runs CLI commands in-process, with imports,
+    fonts and the HTTP pool already warm. A task that crashes the worker or
+    exceeds its timeout only takes the worker down; a fresh one is started.
+    """
+
+    def __init__(self, timeout: float = 600):
+        self.timeout = timeout
+        # no daemon: render-batch necesita lanzar su propio ProcessPool
+        self.ctx = mp.get_context("spawn")
+        self.process = None
+        self.conn = None
+        self.startup_seconds = 0.0
+        self._task_id = 0
+
+    def start(self):
+        parent_conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(target=_worker_main, args=(child_conn,))
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        try:
+            if not self.conn.poll(self.timeout):
+                raise RuntimeError("Worker did not start in time")
+            _, self.startup_seconds = self.conn.recv()
+        except EOFError:
+            # murió importando o calentando; sin proceso, run() lo vuelve a intentar
+            self._kill()
+            raise RuntimeError("Worker exited during startup") from None
+        except RuntimeError:
+            self._kill()
+            raise
+        print(f"Worker ready in {self.startup_seconds:.2f}s (pid {self.process.pid})")
+
+    def _kill(self):
+        if self.process is not None and self.process.is_alive():
+            if hasattr(os, "killpg"):
+                try:
+                    os.killpg(self.process.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            else:
+                self.process.terminate()
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.kill()
+        self.process = None
+        self.conn = None
+
+    def run(self, command: str, timeout: float | None = None) -> bool:
+        if self.process is None or not self.process.is_alive():
+            self.start()
+
+        self._task_id += 1
+        timeout = timeout or self.timeout
+        self.conn.send((self._task_id, shlex.split(command)))
+        try:
+            ready = self.conn.poll(timeout)
+            if not ready:
+                print(f"Task '{command}' timed out after {timeout:g}s, restarting worker")
+                self._kill()
+                return False
+            _, ok, error, elapsed = self.conn.recv()
+        except (EOFError, ConnectionError):
+            print(f"Worker crashed running '{command}', restarting")
+            self._kill()
+            return False
+
+        status = "ok" if ok else f"failed: {error}"
+        print(f"Task '{command}' {status} in {elapsed:.2f}s (saved ~{self.startup_seconds:.2f}s of startup)")
+        return ok
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        if self.process is not None:
+            self.process.join(5)
+        self._kill()